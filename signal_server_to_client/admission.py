@@ -0,0 +1,88 @@
+"""
+Admission control for the streams of a server, so that under a burst
+    of requests the server sheds the excess cleanly rather than
+    becoming slow for every client
+At most MAXIMUM_STREAMS streams are served at once; up to MAXIMUM_PENDING
+    further requests wait for one to complete, and any others are
+    rejected with RESOURCE_EXHAUSTED and a hint of when to retry
+Each session is also held to a budget of memory for its frames
+"""
+
+import threading
+
+# largest number of streams served at once
+MAXIMUM_STREAMS = 64
+# largest number of stream requests waiting to be served
+MAXIMUM_PENDING = 32
+# seconds a request may wait before it is rejected
+ADMISSION_TIMEOUT = 10.
+# seconds after which a rejected client is invited to retry
+RETRY_AFTER = 5
+# name of the gRPC trailing metadata header carrying that hint
+RETRY_HEADER = 'retry-after'
+
+# bytes of frames a session may hold, in the buffer and prefetched
+SESSION_MEMORY_BYTES = 256 * 2**20
+
+class Admission:
+    '''
+    Counts the streams in progress and the requests waiting to be served
+    Methods may be called concurrently from the threads serving RPCs
+    '''
+
+    def __init__(self,streams=MAXIMUM_STREAMS,pending=MAXIMUM_PENDING,
+                 timeout=ADMISSION_TIMEOUT):
+
+        self.streams = streams
+        self.pending = pending
+        self.timeout = timeout
+
+        self._lock = threading.Condition()
+        self._active = 0 # streams in progress
+        self._waiting = 0 # requests waiting
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self):
+        # returns True when a request may start its stream, or False
+        #   if it is rejected because the server is overloaded
+
+        with self._lock:
+            if self._active >= self.streams:
+                if self._waiting >= self.pending:
+                    self.rejected += 1
+                    return False
+                self._waiting += 1
+                admitted = self._lock.wait_for(
+                    lambda: self._active < self.streams, self.timeout)
+                self._waiting -= 1
+                if not admitted:
+                    self.rejected += 1
+                    return False
+            self._active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        # called when a stream admitted by acquire() is complete
+
+        with self._lock:
+            self._active -= 1
+            self._lock.notify()
+
+    def report(self):
+        # returns dictionary with the state of admission, for 'health?'
+
+        with self._lock:
+            return {
+                'active_streams' : self._active,
+                'maximum_streams' : self.streams,
+                'queue_depth' : self._waiting,
+                'maximum_pending' : self.pending,
+                'admitted' : self.admitted,
+                'rejected' : self.rejected
+                }
+
+def retry_message():
+    # details of the RESOURCE_EXHAUSTED status of a rejected request
+    return 'Server busy, retry after {} seconds'.format(RETRY_AFTER)
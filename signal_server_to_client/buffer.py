@@ -1,10 +1,103 @@
+import collections
+import threading
+import time
+
+import numpy as np
 
 # performance-related parameters (no effect on functionalty)
 INITIAL_BUFFER_SIZE = 10
+# initial number of values held by a RingBuffer
+INITIAL_RING_SIZE = 4096
+# a RingBuffer occupied to no more than this fraction after each of
+#   SHRINK_READS successive reads is halved in size, returning memory
+#   after a burst, but never below twice its largest write meanwhile
+SHRINK_OCCUPANCY = 0.25
+SHRINK_READS = 8
+# default watermarks of a BoundedTimeSeriesBuffer, as fractions
+#   of its capacity
+HIGH_WATERMARK = 0.75
+LOW_WATERMARK = 0.25
 # increase in buffer size when needed; must be > 1
 BUFFER_GROWTH_FACTOR = 1.5
+# approximate bytes occupied by one value in a list (a reference
+#   to a Python float or complex), for the memory budget
+LIST_VALUE_BYTES = 32
+
+class BudgetExceeded(Exception):
+    '''
+    Raised when values stored in a TimeSeriesBuffer would exceed its budget
+    '''
+    pass
 
-class CircularBuffer:
+def size_in_bytes(vals):
+    # returns approximate bytes of memory occupied by vals
+    if isinstance(vals, np.ndarray):
+        return vals.nbytes
+    return len(vals) * LIST_VALUE_BYTES
+
+class BufferStatistics:
+    '''
+    Counters kept by each buffer, cheap enough to be always on, from
+        which the number of frames and the depth of prefetching can be
+        sized; they are reset for each run by initialize()
+    A buffer provides occupancy(), and calls fetch() to get values
+        from its server
+    '''
+
+    def reset_statistics(self):
+
+        self.peak_samples = 0 # most values stored at once
+        self.peak_slots = 0 # most locations (or segments) occupied at once
+        self.grow_events = 0 # times the buffer grew
+        self.bytes_copied = 0 # bytes of values copied by the buffer
+        self.fetches = 0 # calls to the server
+        self.fetch_seconds = 0. # time spent in those calls
+        self.wait_seconds = 0. # time consumers waited for values
+
+    def occupancy(self):
+        # returns list containing
+        #   samples = number of values stored
+        #   slots = number of locations (or segments) occupied
+        #   size = number of locations (or values) allocated
+        return [0, 0, 0]
+
+    def occupied(self):
+        # updates the peaks, after values are added
+        [samples, slots, _] = self.occupancy()
+        self.peak_samples = max(self.peak_samples,samples)
+        self.peak_slots = max(self.peak_slots,slots)
+
+    def copied(self,vals):
+        # counts the bytes of vals, a list or array which has been copied
+        self.bytes_copied += size_in_bytes(vals)
+
+    def fetch(self):
+        # returns the next values from the server, timing the call
+
+        start = time.perf_counter()
+        vals = self.server.get()
+        self.fetches += 1
+        self.fetch_seconds += time.perf_counter() - start
+        return vals
+
+    def stats(self):
+        # returns dictionary of the counters, and the current occupancy
+
+        [samples, slots, size] = self.occupancy()
+        return {
+            'samples' : int(samples),
+            'peak_samples' : int(self.peak_samples),
+            'slots' : slots,
+            'peak_slots' : self.peak_slots,
+            'size' : size,
+            'grow_events' : self.grow_events,
+            'bytes_copied' : self.bytes_copied,
+            'fetches' : self.fetches,
+            'fetch_seconds' : self.fetch_seconds,
+            'wait_seconds' : self.wait_seconds
+            }
+
+class CircularBuffer(BufferStatistics):
     '''
     Implements FIFO buffer requiring no rearrangements of
         data in memory during operation
@@ -21,6 +114,7 @@ class CircularBuffer:
         self._oldest = 0 # index of the oldest value stored in buffer
         self._count = 0 # number of values currently stored in buffer
         # newest value is stored at (oldest+count-1) % size
+        self.reset_statistics()
     
     def write(self,vals):
         # vs = value or data structure (typically a list) to be added to buffer
@@ -31,6 +125,7 @@ class CircularBuffer:
             self.grow()           
         self._count += 1
         self._buffer[(self._oldest+self._count -1) % self._size] = vals
+        self.occupied()
             
     def read(self):
         # returns oldest data stored in buffer
@@ -66,6 +161,10 @@ class CircularBuffer:
         else:
             return self._buffer[self._oldest]
 
+    def occupancy(self):
+        # each location counts as a single value
+        return [self._count, self._count, self._size]
+
     def replace(self,vals):
         # replaces oldest data stored in buffer
         #   with new data
@@ -84,50 +183,81 @@ class CircularBuffer:
         # this method used to prevent buffer overwrite and loss of data
 
         add_size = int(self._size * (BUFFER_GROWTH_FACTOR - 1))+1
-        add = [None] * add_size
-        # added buffer locations located in front of oldest value
-        self._buffer = self._buffer[:self._oldest] + add + self._buffer[self._oldest:]
+        # added buffer locations located in front of oldest value,
+        #   inserted in place rather than rebuilding the list
+        self._buffer[self._oldest:self._oldest] = [None] * add_size
         self._size += add_size
         self._oldest += add_size
+        self.grow_events += 1
 
         
 class TimeSeriesBuffer(CircularBuffer):
     '''
     Class manages a CircularBuffer where each location stores
         a list of sample values (value type not specified)
+        or, for packed transport, a 1-D numpy array of sample values
     To prevent side effects (call by reference), the routines
         consistently work with shadow copies (vals[:] rather than vals)
     Keeps track of the total number of values stored in buffer
         and calls signal server when that number is insufficient
     '''
 
-    def __init__(self,server):
+    def __init__(self,server,budget=None):
         # server = signal generator or stub which provides list of
         #   signal samples on request
+        # budget = largest number of bytes of values stored in buffer,
+        #   or None if unlimited
         
         super().__init__()
 
         self.server = server
+        self.budget = budget
         self.initialize()
 
     def initialize(self):
 
+        # discard any values left by an earlier run which ended early
+        self._buffer = [None] * self._size
+        self._oldest = 0
+        self._count = 0
+
         # total number of signal samples stored in buffer; note that this
         #   is different from the number of buffer locations occupied
         #   because each location stores a list of signal samples
         self._sample_count = 0
+        self._bytes = 0 # approximate memory occupied by the values
         self.finished = False # server exhaused
+        self.cancelled = False # stream ended by the client
+        self.reset_statistics()
+
+    def occupancy(self):
+        # each location holds the values of one call to the server
+        return [self._sample_count, self._count, self._size]
+
+    def cancel(self):
+        # stops calling the server for values, and stops returning
+        #   values, once the client has no further use for them
+        # may be called from another thread while get() is in progress
+        self.cancelled = True
+        self.finished = True
         
     def bypass(self):
         # call to get list of signal samples from server
         #   and return those values
         # use this method rather than get() if no buffering is desired
-        return self.server.get()[:]
+        vals = self.fetch()
+        self.copied(vals)
+        return vals[:]
         
     def add(self,vals):
         # vals = list of values to write to the buffer
         
         self._sample_count += len(vals)
+        self._bytes += size_in_bytes(vals)
+        if self.budget is not None and self._bytes > self.budget:
+            raise BudgetExceeded(
+                'Buffered values exceed the memory budget of {} bytes'.format(self.budget))
+        self.copied(vals)
         self.write(vals[:])
 
     def subtract(self,size):
@@ -146,6 +276,12 @@ class TimeSeriesBuffer(CircularBuffer):
             self.read() # removes this location from buffer
             
         self._sample_count -= len(wanted)
+        self._bytes -= size_in_bytes(wanted)
+        if not isinstance(extracted,np.ndarray):
+            # slices of lists are copies, unlike those of arrays
+            self.copied(extracted)
+            self.copied(left_over)
+            self.copied(wanted)
         return wanted[:]
 
     def get(self,size):
@@ -156,32 +292,472 @@ class TimeSeriesBuffer(CircularBuffer):
         # if the signal server exhausts, return a list with len(list) < size
         #   containing all the remaining values from the buffer
 
+        return self.join(self.extract(size))
+
+    def extract(self,size):
+        # as get(), but returns the values as a list of pieces, each
+        #   taken from a single buffer location (and thus coming from
+        #   a single call to the signal server)
+
         # until we find otherwise, server is assumed to have
         #   more signal values available
         
+        start = time.perf_counter()
         while not self.finished and self._sample_count < size:
             # more values should be added to buffer
             # no control over how many samples get() generates,
             #   so may need to call more than once
-            vals = self.server.get()
+            vals = self.fetch()
             if len(vals) > 0:
                 self.add(vals[:])
             else: # server is generating no more data
                 self.finished = True
+        self.wait_seconds += time.perf_counter() - start
+
+        if self.cancelled:
+            return []
 
         if self.finished: # server has exausted, so extract everything in buffer
             extracted = []
             while self._sample_count > 0:
-                extracted += self.subtract(size)
-            return extracted[:]
+                extracted.append(self.subtract(size))
+            return extracted
         
         else: # buffer has sufficient values to satisfy request
             remaining = size
             extracted = []
-            while True:
-                extracted += self.subtract(remaining)
-                remaining = size - len(extracted)
-                if remaining == 0:
-                    return extracted[:]
+            while remaining > 0:
+                extracted.append(self.subtract(remaining))
+                remaining -= len(extracted[-1])
+            return extracted
 
-    
+    def join(self,pieces):
+        # pieces = list of lists of values removed from the buffer
+        #   (or numpy arrays of values, for packed transport)
+        # returns the pieces concatenated into a single list or array
+
+        if len(pieces) == 0:
+            return []
+        elif isinstance(pieces[0], np.ndarray):
+            extracted = np.concatenate(pieces)
+        else:
+            extracted = []
+            for piece in pieces:
+                extracted += piece
+        self.copied(extracted)
+        return extracted
+
+
+class RingBuffer(BufferStatistics):
+    '''
+    FIFO buffer of values held in one preallocated numpy array used
+        as a ring, rather than a list of lists
+    Values are written with at most two vectorized copies, and read as
+        a view of the array, or as a copy of two slices where they wrap
+        around its end
+    The values of each write are kept apart as a segment, so that they
+        can be read back as the separate pieces written
+    The array grows, keeping the values in order, when full
+    '''
+
+    def __init__(self,size=INITIAL_RING_SIZE):
+        # size = number of values the array holds initially
+
+        self._initial_size = size
+        self.clear()
+        self.reset_statistics()
+
+    def clear(self):
+        # discards all values, and the array holding them
+        # the array is allocated again by the next write, with the
+        #   dtype of the values written
+
+        self._array = None
+        self._oldest = 0 # index of the oldest value stored in array
+        self._count = 0 # number of values currently stored in array
+        # newest value is stored at (oldest+count-1) % size
+        self._segments = collections.deque() # number of values of each write
+        self._low_reads = 0 # successive reads leaving the array little occupied
+        self._largest_write = 0 # during those reads
+
+    def size(self):
+        # number of values the array can hold
+        return 0 if self._array is None else len(self._array)
+
+    def occupancy(self):
+        # each segment holds the values of one write
+        return [self._count, len(self._segments), self.size()]
+
+    def write(self,vals):
+        # vals = 1-D numpy array of values to be added to buffer
+
+        n = len(vals)
+        if n == 0: return
+        if self._array is None:
+            self.resize(max(self._initial_size,n),vals.dtype)
+        elif not np.can_cast(vals.dtype,self._array.dtype,'safe'):
+            # promote the values already stored, like float to complex
+            self.resize(self.size(),np.result_type(self._array.dtype,vals.dtype))
+        if self._count + n > self.size():
+            self.grow(self._count + n)
+
+        start = (self._oldest + self._count) % self.size()
+        first = min(n,self.size() - start) # values before the end of the array
+        self._array[start:start+first] = vals[:first]
+        self._array[:n-first] = vals[first:]
+        self._count += n
+        self._segments.append(n)
+        self._largest_write = max(self._largest_write,n)
+        self.bytes_copied += n * self._array.itemsize
+        self.occupied()
+
+    def read(self,size):
+        # returns 1-D numpy array of the oldest size values (or all
+        #   of them if fewer), removing them from the buffer
+        # the array is a view where possible, valid until the next write
+
+        n = min(size,self._count)
+        if n == 0:
+            return np.empty(0,self._array.dtype if self._array is not None else float)
+        start = self._oldest
+        stop = start + n
+        if stop <= self.size():
+            vals = self._array[start:stop]
+        else: # wraps around the end of the array
+            vals = np.concatenate((self._array[start:],self._array[:stop-self.size()]))
+            self.copied(vals)
+        self._oldest = stop % self.size()
+        self._count -= n
+
+        # values read are removed from the oldest segments
+        while n > 0:
+            if self._segments[0] <= n:
+                n -= self._segments.popleft()
+            else:
+                self._segments[0] -= n
+                n = 0
+        self.shrink()
+        return vals
+
+    def read_pieces(self,size):
+        # as read(), but returns a list of arrays, one for each
+        #   segment (or part of a segment) read
+
+        pieces = []
+        while size > 0 and self._count > 0:
+            pieces.append(self.read(min(size,self._segments[0])))
+            size -= len(pieces[-1])
+        return pieces
+
+    def resize(self,size,dtype):
+        # moves the values into a new array of size values and dtype,
+        #   with the oldest value first
+
+        array = np.empty(size,dtype)
+        if self._count > 0:
+            start = self._oldest
+            first = min(self._count,self.size() - start)
+            array[:first] = self._array[start:start+first]
+            array[first:self._count] = self._array[:self._count-first]
+            self.bytes_copied += self._count * array.itemsize
+        self._array = array
+        self._oldest = 0
+        self._low_reads = 0
+
+    def grow(self,needed):
+        # grow the array exponentially, to hold at least needed values
+        self.grow_events += 1
+        self.resize(max(needed,int(self.size() * BUFFER_GROWTH_FACTOR) + 1),
+                    self._array.dtype)
+
+    def shrink(self):
+        # halve the array once a burst has passed, but never below its
+        #   initial size, nor so far that the writes now arriving make it
+        #   grow again; arrays returned by read() are not affected
+
+        size = self.size()
+        if self._count > size * SHRINK_OCCUPANCY:
+            self._low_reads = 0
+            return
+        if self._low_reads == 0:
+            self._largest_write = 0
+        self._low_reads += 1
+        smaller = max(size // 2,self._initial_size,2 * self._largest_write)
+        if self._low_reads >= SHRINK_READS and smaller < size:
+            self.resize(smaller,self._array.dtype)
+
+
+class ArrayTimeSeriesBuffer(RingBuffer):
+    '''
+    Drop-in replacement for TimeSeriesBuffer, holding the values in
+        a RingBuffer, so that no per-value copies are made
+    Values from the server may be lists or numpy arrays, and are
+        returned as numpy arrays, which are views where possible and
+        must be used before the buffer is called again
+    '''
+
+    def __init__(self,server,budget=None):
+        # server = signal generator or stub which provides
+        #   signal samples on request
+        # budget = largest number of bytes of values stored in buffer,
+        #   or None if unlimited
+
+        super().__init__()
+
+        self.server = server
+        self.budget = budget
+        self.initialize()
+
+    def initialize(self):
+
+        # discard any values left by an earlier run which ended early
+        self.clear()
+        self.finished = False # server exhaused
+        self.cancelled = False # stream ended by the client
+        self.reset_statistics()
+
+    @property
+    def _sample_count(self):
+        # total number of signal samples stored in buffer
+        return self._count
+
+    def cancel(self):
+        # as TimeSeriesBuffer.cancel()
+        self.cancelled = True
+        self.finished = True
+
+    def stop(self):
+        # nothing is filled ahead, so there is nothing to stop
+        pass
+
+    def bypass(self):
+        # call to get signal samples from server and return those values
+        return np.asarray(self.fetch())
+
+    def add(self,vals):
+        # vals = list or numpy array of values to write to the buffer
+
+        if not isinstance(vals,np.ndarray):
+            vals = np.asarray(vals)
+            self.copied(vals)
+        vals = np.ravel(vals)
+        if self.budget is not None and \
+                (self._count + len(vals)) * vals.itemsize > self.budget:
+            raise BudgetExceeded(
+                'Buffered values exceed the memory budget of {} bytes'.format(self.budget))
+        self.write(vals)
+
+    def subtract(self,size):
+        # size = number of values to attempt to remove from buffer
+        # returns numpy array of the values removed, which are fewer
+        #   than size if the buffer holds fewer
+        return self.read(size)
+
+    def fill(self,size):
+        # calls the server until the buffer holds size values,
+        #   or the server is exhausted
+
+        start = time.perf_counter()
+        while not self.finished and self._count < size:
+            vals = self.fetch()
+            if len(vals) > 0:
+                self.add(vals)
+            else: # server is generating no more data
+                self.finished = True
+        self.wait_seconds += time.perf_counter() - start
+
+    def get(self,size):
+        # as TimeSeriesBuffer.get(), but returns a numpy array
+
+        self.fill(size)
+        if self.cancelled or self._count == 0:
+            return []
+        return self.read(size)
+
+    def extract(self,size):
+        # as TimeSeriesBuffer.extract(), returning a list of numpy
+        #   arrays, each from a single call to the signal server
+
+        self.fill(size)
+        if self.cancelled:
+            return []
+        return self.read_pieces(size)
+
+    def join(self,pieces):
+        # as TimeSeriesBuffer.join()
+        if len(pieces) == 0:
+            return []
+        extracted = np.concatenate(pieces)
+        self.copied(extracted)
+        return extracted
+
+
+class BoundedTimeSeriesBuffer(ArrayTimeSeriesBuffer):
+    '''
+    ArrayTimeSeriesBuffer holding at most capacity values, filled ahead
+        of the consumer by a producer thread which calls the server
+    The producer waits while the buffer is full, so the server (and
+        its generator) is paused, and memory is bounded by the capacity
+    Crossing the high watermark on the way up, and the low watermark on
+        the way down, calls on_high() and on_low(), if given, so that
+        the server can also pause work of its own (such as prefetching)
+    Consumers may call get() and extract() from any thread; values
+        returned are copies
+    '''
+
+    def __init__(self,server,budget=None,capacity=INITIAL_RING_SIZE,
+                 high=HIGH_WATERMARK,low=LOW_WATERMARK,on_high=None,on_low=None):
+        # capacity = largest number of values stored in buffer, but for
+        #   a single frame larger than it
+        # high, low = watermarks as fractions of capacity
+        # on_high, on_low = functions called when the watermarks are crossed
+
+        self.capacity = capacity
+        self.high = max(int(high * capacity),1)
+        self.low = int(low * capacity)
+        self.on_high = on_high
+        self.on_low = on_low
+
+        self._lock = threading.Condition()
+        self._producer = None
+        self._waiting = False # producer waiting for room?
+
+        super().__init__(server,budget)
+        self._initial_size = min(self._initial_size,capacity)
+
+    def initialize(self):
+        # stop any producer of an earlier run
+
+        self.stop()
+        super().initialize()
+        self.above = False # above the high watermark?
+        self.error = None # exception raised by the producer
+
+    def reset_statistics(self):
+        super().reset_statistics()
+        self.producer_waits = 0 # times the producer found the buffer full
+
+    def stats(self):
+        # as BufferStatistics.stats(), with the capacity and the
+        #   times the producer waited for room
+        with self._lock:
+            r = super().stats()
+        r['capacity'] = self.capacity
+        r['producer_waits'] = self.producer_waits
+        return r
+
+    def stop(self):
+        # ends the producer thread, if any, which may itself call
+        #   stop() by way of the server
+
+        producer = self._producer
+        if producer is not None:
+            self.cancel()
+            if producer is not threading.current_thread():
+                producer.join()
+            self._producer = None
+
+    def cancel(self):
+        # as ArrayTimeSeriesBuffer.cancel(), waking any waiting thread
+        with self._lock:
+            super().cancel()
+            self._lock.notify_all()
+
+    def produce(self):
+        # body of the producer thread
+
+        try:
+            while not self.cancelled:
+                vals = self.fetch()
+                if len(vals) == 0: # server is generating no more data
+                    break
+                self.put(vals)
+        except Exception as e:
+            self.error = e # raised again by the consumer
+        with self._lock:
+            self.finished = True
+            self._lock.notify_all()
+
+    def put(self,vals,timeout=None):
+        # vals = list or numpy array of values to add to the buffer,
+        #   waiting (for at most timeout seconds, if given) for room
+        # returns True if added, or False if cancelled or timed out
+
+        # a frame larger than the capacity is added to an empty
+        #   buffer, rather than waiting for ever
+        vals = np.ravel(np.asarray(vals))
+        room = lambda: (self.cancelled or self._count == 0 or
+                        self._count + len(vals) <= self.capacity)
+        crossed = False
+        with self._lock:
+            end = None if timeout is None else time.monotonic() + timeout
+            if not room():
+                self.producer_waits += 1
+            while not room():
+                # a consumer waiting for more values than can be
+                #   added takes those already stored instead
+                self._waiting = True
+                self._lock.notify_all()
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0:
+                    self._waiting = False
+                    return False
+                self._lock.wait(left)
+            self._waiting = False
+            if self.cancelled:
+                return False
+            self.add(vals)
+            if not self.above and self._count >= self.high:
+                self.above = crossed = True
+            self._lock.notify_all()
+        if crossed and self.on_high is not None:
+            self.on_high()
+        return True
+
+    def take(self,size,pieces,timeout):
+        # waits for size values, or the end of the run, and removes them
+        # returns them as a list of pieces if pieces, or otherwise as an
+        #   array, or [] if none remain or the wait timed out
+
+        if self._producer is None and not self.finished:
+            self._producer = threading.Thread(target=self.produce,daemon=True)
+            self._producer.start()
+
+        # above the high watermark, the producer may be waiting on
+        #   work paused by on_high(), so those values stored are taken
+        crossed = False
+        with self._lock:
+            start = time.perf_counter()
+            self._lock.wait_for(
+                lambda: (self.finished or self._count >= size or
+                         self._waiting or self.above),
+                timeout)
+            self.wait_seconds += time.perf_counter() - start
+            if self.error is not None:
+                raise self.error
+            if self.cancelled or self._count == 0:
+                return []
+            # copies, since the producer reuses the space read
+            if pieces:
+                vals = [np.array(p) for p in self.read_pieces(size)]
+                self.bytes_copied += sum(p.nbytes for p in vals)
+            else:
+                vals = np.array(self.read(size))
+                self.copied(vals)
+            self._waiting = False # room has been made
+            if self.above and self._count <= self.low:
+                self.above = False
+                crossed = True
+            self._lock.notify_all()
+        if crossed and self.on_low is not None:
+            self.on_low()
+        return vals
+
+    def get(self,size,timeout=None):
+        # as ArrayTimeSeriesBuffer.get(), waiting for the producer
+        # fewer values are returned if size values would not fit
+        return self.take(size,False,timeout)
+
+    def extract(self,size,timeout=None):
+        # as ArrayTimeSeriesBuffer.extract(), waiting for the producer
+        return self.take(size,True,timeout)
@@ -0,0 +1,93 @@
+"""
+Lossless compression of the packed payload of Frame messages
+A codec is named by its filters followed by its compressor, separated
+    by '-', for example 'delta-shuffle-zlib'
+    'delta' = replace each value by its difference from the previous
+        value of the same component (using integer arithmetic on the
+        bit patterns, so floating-point values are restored exactly)
+    'shuffle' = group the first bytes of all values together, then
+        the second bytes, and so on, so that slowly varying values
+        produce long runs of similar bytes
+    'zlib' or 'lz4' = general-purpose compressor applied last
+The filters are cheap numpy operations over whole arrays
+"""
+
+import zlib
+import numpy as np
+
+# lz4 is faster than zlib but is optional
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# zlib compression level; low levels are much faster and, after
+#   the filters, compress numeric data almost as well
+ZLIB_LEVEL = 1
+
+COMPRESSORS = ['zlib'] + (['lz4'] if lz4 else [])
+FILTERS = ['delta','shuffle']
+
+# codecs which can be negotiated, 'none' meaning the payload is sent as is
+CODECS = ['none']
+for compressor in COMPRESSORS:
+    CODECS += [
+        compressor,
+        'shuffle-' + compressor,
+        'delta-shuffle-' + compressor
+        ]
+
+def components(vals):
+    # returns a 2-D view of vals as unsigned integers with the bit
+    #   patterns of each real (or real and imag) component in columns
+
+    width = 2 if vals.dtype.kind == 'c' else 1
+    unsigned = np.dtype('u{}'.format(vals.dtype.itemsize // width))
+    return vals.reshape(-1).view(unsigned).reshape(-1,width)
+
+def encode(vals,codec):
+    # vals = contiguous numpy array of values
+    # codec = one of CODECS
+    # returns the payload as bytes
+
+    if codec == 'none':
+        return memoryview(vals).tobytes()
+
+    steps = codec.split('-')
+    c = components(np.ascontiguousarray(vals))
+    if 'delta' in steps:
+        # differences wrap around in unsigned arithmetic, losing nothing
+        c = np.diff(c,axis=0,prepend=np.zeros((1,c.shape[1]),c.dtype))
+    data = c.reshape(-1)
+    if 'shuffle' in steps:
+        data = data.view(np.uint8).reshape(-1,data.itemsize).T
+    data = np.ascontiguousarray(data)
+
+    if steps[-1] == 'lz4':
+        return lz4.frame.compress(data)
+    return zlib.compress(data,ZLIB_LEVEL)
+
+def decode(payload,codec,dtype):
+    # payload = bytes produced by encode()
+    # codec = codec named by the frame
+    # dtype = numpy dtype of the values
+    # returns 1-D numpy array of values
+
+    dtype = np.dtype(dtype)
+    if codec == 'none':
+        return np.frombuffer(payload,dtype=dtype)
+
+    steps = codec.split('-')
+    if steps[-1] == 'lz4':
+        data = np.frombuffer(lz4.frame.decompress(payload),dtype=np.uint8)
+    else:
+        data = np.frombuffer(zlib.decompress(payload),dtype=np.uint8)
+
+    count = data.size // dtype.itemsize
+    c = components(np.empty(count,dtype=dtype))
+    if 'shuffle' in steps:
+        data = data.reshape(c.dtype.itemsize,-1).T
+    c[:] = np.ascontiguousarray(data).view(c.dtype).reshape(c.shape)
+    if 'delta' in steps:
+        np.cumsum(c,axis=0,dtype=c.dtype,out=c)
+    return c.view(dtype).reshape(-1)
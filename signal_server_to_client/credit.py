@@ -0,0 +1,117 @@
+"""
+Pacing of a stream by credit granted by the client, so that the server
+    generates frames only as fast as the client consumes them
+The client sends Credit messages on its half of a bidirectional stream:
+    each grants a number of further frames, and may also change the
+    number of frames per message, the number of time-samples per frame,
+    or pause the stream until credit is granted again
+A slow client (like one plotting each frame) then holds no more than
+    the frames it has granted, while a fast one can grant larger batches
+"""
+
+import threading
+import time
+
+# seconds between checks for cancellation while waiting for credit
+POLL_INTERVAL = 0.1
+
+class Credits:
+    '''
+    Credit granted by the client for one stream and not yet spent
+    grant() and close() are called as Credit messages arrive, while
+        take() and spend() are called by the thread producing the stream
+    '''
+
+    def __init__(self):
+
+        self._lock = threading.Condition()
+        self.available = 0 # frames granted and not yet sent
+        self.batch = 1 # largest number of frames in one message
+        self.paused = False
+        self.closed = False # the client will grant no further credit
+        self.frame_samples = 0 # new frame size requested, 0 = none
+
+        # statistics for the stream report
+        self.granted = 0 # frames granted
+        self.waits = 0 # times the stream waited for credit
+        self.wait_seconds = 0. # total time spent waiting
+
+    def grant(self,credit):
+        # credit = Credit message from the client
+
+        with self._lock:
+            self.available += credit.frames
+            self.granted += credit.frames
+            if credit.batch > 0:
+                self.batch = credit.batch
+            if credit.frame_samples > 0:
+                self.frame_samples = credit.frame_samples
+            self.paused = credit.pause
+            self._lock.notify()
+
+    def receive(self,credits):
+        # credits = iterator over the Credit messages of the client,
+        #   consumed in a thread of its own
+
+        try:
+            for credit in credits:
+                self.grant(credit)
+        except Exception:
+            pass # the stream has ended
+        finally:
+            self.close()
+
+    def close(self):
+        # the client has finished sending credit, so the stream ends
+        #   once the credit already granted is spent
+        with self._lock:
+            self.closed = True
+            self._lock.notify()
+
+    def take(self,stopped):
+        # waits until credit is available and the stream is not paused
+        # stopped = function returning True if the stream has ended early
+        # returns the number of frames which may be sent in the next
+        #   message, or 0 if the stream is to end
+
+        with self._lock:
+            if self.usable() == 0 and not self.closed:
+                self.waits += 1
+            start = time.perf_counter()
+            while not stopped() and self.usable() == 0 and not self.closed:
+                self._lock.wait(POLL_INTERVAL)
+            self.wait_seconds += time.perf_counter() - start
+            if stopped():
+                return 0
+            return self.usable()
+
+    def usable(self):
+        # frames which may be sent now; must be called with the lock held
+        if self.paused:
+            return 0
+        return min(self.available,self.batch)
+
+    def spend(self,frames):
+        # frames = number of frames sent
+        with self._lock:
+            self.available -= frames
+
+    def resize(self):
+        # returns the number of time-samples per frame newly requested
+        #   by the client, or 0 if none
+
+        with self._lock:
+            samples = self.frame_samples
+            self.frame_samples = 0
+            return samples
+
+    def report(self):
+        # returns dictionary of statistics for the stream report
+
+        with self._lock:
+            return {
+                'granted' : self.granted,
+                'unspent' : self.available,
+                'waits' : self.waits,
+                'wait_seconds' : self.wait_seconds
+                }
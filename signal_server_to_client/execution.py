@@ -0,0 +1,411 @@
+"""
+Execution of time-series generators in worker processes, so that heavy
+    generators (like a periodogram computed by scipy) use other cores
+    rather than holding the interpreter lock of the server
+A generator class chooses this with the class attribute
+    __execution__ = 'process'
+Each run of such a generator is pinned to a worker process of a pool.
+    The worker runs ahead of the server, writing each frame into a slot
+    of a ring in shared memory, so that frame values are never pickled;
+    only the layout of each frame is sent through a pipe
+"""
+
+import importlib
+import multiprocessing
+import os
+import threading
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# largest number of worker processes
+PROCESS_WORKERS = os.cpu_count() or 1
+# number of frames a worker may run ahead of the server
+RING_SLOTS = 4
+# seconds to wait for a free worker before running the generator
+#   in the server process instead
+LEASE_TIMEOUT = 5.
+# alignment in bytes of each array within a slot
+ALIGNMENT = 64
+# raised by the pipe to a worker process which has exited
+LOST = (EOFError,OSError)
+
+# workers are started afresh rather than forked, since forking
+#   a process with gRPC threads running is unsafe
+CONTEXT = multiprocessing.get_context('spawn')
+
+def execution(gen):
+    # returns 'process' or 'thread', the execution chosen by generator gen
+    return getattr(type(gen),'__execution__','thread')
+
+def prepare(gen,p):
+    # gen = time-series generator, equipped with its parameter values
+    # p = dictionary of those parameter values
+    # returns gen itself, or a stand-in running it in a worker process
+
+    if isinstance(gen,RemoteGenerator):
+        gen = gen.gen # a previous run
+    if execution(gen) == 'process':
+        return RemoteGenerator(gen,p)
+    return gen
+
+def seek(gen,sample):
+    # positions initialized generator gen so that its next frame
+    #   starts at time-sample sample, using its seek() if it has one,
+    #   and otherwise generating and discarding whole frames
+    # returns True if successful, or False if sample is not at the
+    #   start of a frame of a generator without seek()
+
+    if hasattr(gen,'seek'):
+        gen.seek(sample)
+        return True
+    skipped = 0
+    while skipped < sample:
+        vals_list = gen.generate()
+        if not framed(vals_list):
+            break # exhausted
+        skipped += vals_list[0].shape[0]
+    return skipped <= sample
+
+class RemoteGenerator:
+    '''
+    Stands in for a time-series generator running in a worker process,
+        with the same initialize() and generate() methods
+    If no worker becomes free in time, the generator is run in the
+        server process as usual
+    A worker whose process exits is replaced in the pool, ending the
+        run with an error (or, before it starts, running the generator
+        in the server process)
+    '''
+
+    def __init__(self,gen,p):
+        # gen = time-series generator in the server process
+        # p = dictionary of parameter values
+
+        self.gen = gen
+        self.p = p
+        self.worker = None
+        self.local = False # running in the server process?
+        self.segment = None # shared memory of the ring of the worker
+        self.cancelled = False
+        self.running = False # has the worker started generating?
+
+    def initialize(self):
+
+        # an idle worker found to have exited is replaced, once
+        cls = type(self.gen)
+        for attempt in range(2):
+            self.worker = pool().lease()
+            if self.worker is None:
+                break
+            try:
+                self.worker.conn.send(['start', cls.__module__, cls.__name__, self.p])
+                reply = self.worker.conn.recv()
+                break
+            except LOST:
+                self.lost()
+        if self.worker is None:
+            print('\nNo worker process free, running generator in server')
+            self.local = True
+            return self.gen.initialize()
+
+        if reply[0] == 'error':
+            pool().give_back(self.worker)
+            self.worker = None
+            raise RuntimeError('Generator failed in worker process: ' + reply[1])
+        self.running = False
+        return reply[1]
+
+    def seek(self,sample):
+        # the worker starts generating at time-sample sample, rather
+        #   than at the start of the run
+        # must be called after initialize() and before generate()
+        # returns True if successful, as for the function seek()
+
+        if self.local:
+            return seek(self.gen,sample)
+        try:
+            self.worker.conn.send(['run', sample])
+            self.running = True
+            return self.worker.conn.recv()[1]
+        except LOST:
+            self.lost()
+            return False
+
+    def generate(self):
+        # returns the next frame from the worker, copied out of its slot
+        #   with one memcpy per array, after which the slot is released
+
+        if self.local:
+            return self.gen.generate()
+        if self.worker is None or self.cancelled: # run completed or cancelled
+            return []
+        if not self.running and not self.seek(0): # worker lost
+            raise RuntimeError('Worker process of generator exited')
+
+        try:
+            reply = self.worker.conn.recv()
+            if reply[0] == 'done':
+                # exhausted (or not a list of arrays, for the server to reject)
+                self.close()
+                return reply[1]
+
+            [_, name, slot, layout] = reply
+            buf = self.attach(name).buf
+            vals_list = [
+                np.ndarray(shape,dtype=dtype,buffer=buf,offset=offset).copy()
+                for [offset,dtype,shape] in layout
+                ]
+            self.worker.conn.send(['release', slot])
+        except LOST:
+            self.lost()
+            raise RuntimeError('Worker process of generator exited')
+        return vals_list
+
+    def cancel(self):
+        # called from another thread when the stream is cancelled
+        # the worker stops once its ring is full, and is returned
+        #   to the pool by close()
+        self.cancelled = True
+        if self.local and hasattr(self.gen,'cancel'):
+            self.gen.cancel()
+
+    def attach(self,name):
+        # returns the shared memory of the ring named name,
+        #   which changes only when the worker outgrows its ring
+
+        if self.segment is None or self.segment.name != name:
+            self.detach()
+            self.segment = shared_memory.SharedMemory(name=name)
+        return self.segment
+
+    def detach(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+    def close(self):
+        # ends the run, returning the worker to the pool
+
+        if self.worker is not None:
+            try:
+                self.worker.conn.send(['stop'])
+                while self.worker.conn.recv()[0] != 'stopped':
+                    pass # frames made ahead are discarded
+            except LOST:
+                self.lost()
+                return
+            self.detach()
+            pool().give_back(self.worker)
+            self.worker = None
+
+
+    def lost(self):
+        # the worker process has exited, so its ring (which it can no
+        #   longer remove) is removed, and the worker is replaced in
+        #   the pool rather than given back
+
+        if self.segment is not None:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+        self.detach()
+        pool().discard(self.worker)
+        self.worker = None
+
+
+class Worker:
+    '''
+    A worker process and the server end of the pipe connected to it
+    '''
+
+    def __init__(self):
+
+        self.conn, child = CONTEXT.Pipe()
+        self.process = CONTEXT.Process(target=work,args=(child,),daemon=True)
+        self.process.start()
+
+
+class ProcessPool:
+    '''
+    Pool of worker processes, each leased to one generator run at a time
+    Workers are started as needed, up to the size of the pool
+    '''
+
+    def __init__(self,size=PROCESS_WORKERS):
+
+        self.size = size
+        self._idle = []
+        self._started = 0
+        self._lock = threading.Condition()
+
+    def lease(self,timeout=LEASE_TIMEOUT):
+        # returns an idle worker, or None if none becomes idle in time
+
+        with self._lock:
+            if not self._lock.wait_for(
+                    lambda: len(self._idle) > 0 or self._started < self.size,
+                    timeout):
+                return None
+            if len(self._idle) > 0:
+                return self._idle.pop()
+            self._started += 1
+            return Worker()
+
+    def give_back(self,worker):
+        with self._lock:
+            self._idle.append(worker)
+            self._lock.notify()
+
+    def discard(self,worker):
+        # worker = leased worker whose process has exited, or is ended
+        #   now, so that a new worker can be started in its place
+
+        worker.conn.close()
+        worker.process.kill()
+        worker.process.join()
+        with self._lock:
+            self._started -= 1
+            self._lock.notify()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool():
+    # returns the pool of worker processes of this server,
+    #   which is created on first use
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPool()
+        return _pool
+
+
+#   ********** inside the worker process *************
+
+class Ring:
+    '''
+    Slots in shared memory, each holding one frame of values
+    The ring is replaced by a larger one if a frame does not fit
+    '''
+
+    def __init__(self):
+        self.segment = None
+        self.slot_bytes = 0
+        self.free = list(range(RING_SLOTS))
+
+    def write(self,vals_list):
+        # vals_list = list of numpy arrays of one frame
+        # returns [slot, layout] where layout lists the offset, dtype and
+        #   shape of each array, or None until a suitable slot is free
+
+        layout = []
+        size = 0
+        for vals in vals_list:
+            layout.append([size, vals.dtype.str, vals.shape])
+            size += -(-vals.nbytes // ALIGNMENT) * ALIGNMENT
+
+        if size > self.slot_bytes:
+            if len(self.free) < RING_SLOTS:
+                return None # the server still holds frames of the old ring
+            self.close()
+            self.slot_bytes = max(size,ALIGNMENT)
+            self.segment = shared_memory.SharedMemory(
+                create=True,size=RING_SLOTS*self.slot_bytes)
+        if len(self.free) == 0:
+            return None
+
+        slot = self.free.pop(0)
+        for i in range(len(vals_list)):
+            offset = slot * self.slot_bytes + layout[i][0]
+            layout[i][0] = offset
+            np.ndarray(vals_list[i].shape,dtype=vals_list[i].dtype,
+                buffer=self.segment.buf,offset=offset)[...] = vals_list[i]
+        return [slot, layout]
+
+    def release(self,slot):
+        self.free.append(slot)
+
+    def close(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+def framed(vals_list):
+    # is vals_list a non-empty list of numpy arrays, like a frame?
+    return (
+        isinstance(vals_list,list) and len(vals_list) > 0 and
+        all(isinstance(vals,np.ndarray) for vals in vals_list)
+        )
+
+def work(conn):
+    # body of a worker process
+    # conn = worker end of the pipe connected to the server
+
+    while True:
+        # request = ['start', module, class name, parameter values]
+        request = conn.recv()
+        try:
+            gen = getattr(importlib.import_module(request[1]),request[2])()
+            for field in request[3].keys():
+                setattr(gen,field,request[3][field])
+            conn.send(['ok', gen.initialize()])
+        except Exception as e:
+            conn.send(['error', repr(e)])
+            continue
+
+        # request = ['run', time-sample to start at], or ['stop']
+        request = conn.recv()
+        if request[0] == 'stop':
+            conn.send(['stopped'])
+            continue
+        try:
+            ok = seek(gen,request[1]) if request[1] > 0 else True
+        except Exception:
+            traceback.print_exc()
+            ok = False
+        conn.send(['seeked', ok])
+        run(gen,conn)
+
+def run(gen,conn):
+    # generates frames ahead of the server into the ring, until
+    #   the server sends 'stop'
+
+    ring = Ring()
+    pending = None # a frame waiting for a slot
+    finished = False
+    try:
+        while True:
+            if not finished and pending is None:
+                try:
+                    pending = gen.generate()
+                except Exception:
+                    # reported here; the server sees output it rejects
+                    traceback.print_exc()
+                    pending = None
+                if framed(pending):
+                    pending = [np.ascontiguousarray(vals) for vals in pending]
+                else:
+                    conn.send(['done', pending])
+                    finished = True
+                    pending = None
+
+            if pending is not None:
+                written = ring.write(pending)
+                if written is not None:
+                    conn.send(['frame', ring.segment.name] + written)
+                    pending = None
+
+            # attend to the server, waiting for it if nothing can be done
+            if conn.poll() or finished or pending is not None:
+                request = conn.recv()
+                if request[0] == 'release':
+                    ring.release(request[1])
+                elif request[0] == 'stop':
+                    break
+    finally:
+        ring.close()
+    conn.send(['stopped'])
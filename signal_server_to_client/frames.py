@@ -0,0 +1,183 @@
+"""
+Packing of numpy arrays into Frame messages and unpacking them again
+Shared by server and client so that both ends agree on the wire format
+A Frame carries its samples as one block of raw bytes, so no
+    per-sample Python objects are created on either end
+"""
+
+import sys
+import numpy as np
+
+import compression
+
+# numpy dtype used on the wire for each 'data_type' chosen by a generator
+# these match the precision of the float fields in RealSample and Complex
+WIRE_DTYPES = {'real':'float32', 'complex':'complex64'}
+
+# complex dtypes that can be negotiated for 'complex' data_type
+# both are interleaved (real,imag) pairs in one contiguous block
+COMPLEX_DTYPES = ['complex64','complex128']
+
+# integer dtypes available for lossy quantized transport
+# the symmetric range +-limit is used, so zero is represented exactly
+QUANTIZE_LIMITS = {'int8':127, 'int16':32767}
+
+# byte order of this platform, used to resolve native ('=') byte order
+NATIVE_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+def wire_dtype(data_type,transport,sample_dtype=None):
+    # data_type = 'real' or 'complex' as chosen by the generator
+    # transport = transport configuration agreed at 'set'
+    # sample_dtype = numpy dtype string of the values as the generator
+    #   stores them, or None if the generator does not declare one
+    # returns the numpy dtype to be used on the wire
+
+    if sample_dtype is not None and transport['native_dtype']:
+        # pass values through unconverted, in their own byte order
+        return sample_dtype
+    if data_type == 'complex':
+        return transport['complex_dtype']
+    return WIRE_DTYPES[data_type]
+
+def pack(vals,sequence,codec='none'):
+    # vals = numpy array of sample values
+    # sequence = position of this frame in the stream
+    # codec = lossless codec applied to the payload, one of compression.CODECS
+    # returns a dictionary of Frame fields
+
+    # without a codec, the payload is filled directly from the array
+    #   memory through the buffer protocol (no conversion of values)
+    vals = np.ascontiguousarray(vals)
+    byte_order = vals.dtype.byteorder
+    if byte_order in '=|': # native, or not applicable (single bytes)
+        byte_order = NATIVE_BYTE_ORDER
+
+    r = {
+        'payload' : compression.encode(vals,codec),
+        'codec' : codec if codec != 'none' else '',
+        'dtype' : vals.dtype.name,
+        'byte_order' : byte_order,
+        'shape' : vals.shape,
+        'sequence' : sequence
+        }
+    return r
+
+def quantizable(dtype):
+    # only floating-point values (real or complex) are quantized;
+    #   integer values are already compact and are sent as they are
+    return np.dtype(dtype).kind in 'fc'
+
+def quantized_itemsize(dtype,quantize):
+    # bytes on the wire for one value of dtype quantized to quantize
+
+    if not quantizable(dtype):
+        return np.dtype(dtype).itemsize
+    components = 2 if np.dtype(dtype).kind == 'c' else 1
+    return components * np.dtype(quantize).itemsize
+
+def quantize(pieces,sequence,quantize,codec='none'):
+    # pieces = list of numpy arrays of floating-point (real or complex)
+    #   values, each containing values of a single multiplexed time-series
+    # sequence = position of this frame in the stream
+    # quantize = name of integer dtype, a key of QUANTIZE_LIMITS
+    # codec = lossless codec applied to the quantized payload
+    # returns list containing
+    #   r = dictionary of Frame fields, with one scale and offset
+    #     for each piece (real and imag parts share them)
+    #   recovered = list of the pieces as the client will recover them,
+    #     for measuring the accuracy
+
+    limit = QUANTIZE_LIMITS[quantize]
+    dtype = pieces[0].dtype
+    r = {'segments':[], 'scale':[], 'offset':[]}
+    q = [None] * len(pieces)
+    recovered = [None] * len(pieces)
+
+    for i in range(len(pieces)):
+        # real and imag parts interleaved
+        components = np.ascontiguousarray(pieces[i],dtype=dtype)
+        components = components.view(components.real.dtype)
+
+        low = components.min() if components.size > 0 else 0.
+        high = components.max() if components.size > 0 else 0.
+        offset = (high + low) / 2
+        scale = (high - low) / (2 * limit)
+        if scale > 0:
+            q[i] = np.rint((components - offset) / scale).astype(quantize)
+        else: # constant values are represented by the offset alone
+            q[i] = np.zeros(components.shape,dtype=quantize)
+
+        r['segments'].append(len(pieces[i]))
+        r['scale'].append(float(scale))
+        r['offset'].append(float(offset))
+        recovered[i] = dequantize(q[i],r['scale'][i],r['offset'][i],dtype)
+
+    r.update(pack(np.concatenate(q),sequence,codec))
+    r['shape'] = [sum(r['segments'])]
+    r['quantized_from'] = dtype.name
+    return [r, recovered]
+
+def dequantize(q,scale,offset,dtype):
+    # q = array of quantized integer components
+    # returns array of dtype (real or complex) with recovered values
+
+    dtype = np.dtype(dtype)
+    components = (q * dtype.type(scale).real) + dtype.type(offset).real
+    return components.view(dtype)
+
+def unpack(frame):
+    # frame = Frame message received from the server
+    # returns a (read-only) numpy array which is a view onto the
+    #   payload of the message, so values are not copied
+    # compressed and quantized frames are transparently converted back
+    #   to their original values, which of course requires a new array
+
+    dtype = np.dtype(frame.dtype).newbyteorder(frame.byte_order)
+    if frame.codec:
+        vals = compression.decode(frame.payload,frame.codec,dtype)
+    else:
+        vals = np.frombuffer(frame.payload,dtype=dtype)
+    if frame.quantized_from:
+        # each segment has its own scale and offset
+        # (complex values have two components each)
+        q = vals
+        vals = np.empty(sum(frame.segments),dtype=frame.quantized_from)
+        components = 2 if vals.dtype.kind == 'c' else 1
+        start = 0
+        for i in range(len(frame.segments)):
+            stop = start + frame.segments[i]
+            vals[start:stop] = dequantize(
+                q[start*components:stop*components],
+                frame.scale[i],frame.offset[i],frame.quantized_from)
+            start = stop
+    return vals.reshape(list(frame.shape))
+
+class QuantizationAccuracy:
+    '''
+    Accumulates the error of quantized values over a stream,
+        for the accuracy report returned to the client
+    '''
+
+    def __init__(self):
+        self.max_error = 0.
+        self.sum_squares = 0.
+        self.samples = 0
+
+    def add(self,vals,recovered):
+        # vals = original values; recovered = values after quantization
+
+        if vals.size == 0: return
+        error = np.abs(recovered - vals)
+        self.max_error = max(self.max_error,float(error.max()))
+        self.sum_squares += float(np.sum(error.astype(np.float64) ** 2))
+        self.samples += vals.size
+
+    def report(self):
+        # returns dictionary with maximum and RMS error over the stream
+
+        rms = (self.sum_squares / self.samples) ** 0.5 if self.samples else 0.
+        return {
+            'max_error' : self.max_error,
+            'rms_error' : rms,
+            'samples' : self.samples
+            }
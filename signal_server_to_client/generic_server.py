@@ -5,6 +5,7 @@ Progammer David G Messerschmitt
 """
 
 from concurrent import futures
+import asyncio
 import time
 import importlib
 
@@ -17,9 +18,19 @@ import grpc
 grpcServe = importlib.import_module('{0}_pb2_grpc'.format(PROTO_FILE))
 grpcServicer = getattr(grpcServe,'{0}Servicer'.format(SERVICE))
 grpcAddServicer = getattr(grpcServe,'add_{0}Servicer_to_server'.format(SERVICE))
+# stub for calls among servers, like sibling worker processes
+grpcStub = getattr(grpcServe,'{0}Stub'.format(SERVICE))
 
 # Configuration
 MAXIMUM_SERVICE_TIME_IN_MINUTES = 60
+# number of threads serving RPCs, which bounds the number of
+#   streams served concurrently
+MAXIMUM_WORKERS = 100
+# 'threads' = each RPC is served by a thread of the pool
+# 'aio' = RPCs are served by the asyncio server, on which servicer
+#   methods may be coroutines or async generators
+SERVER_MODE = 'threads'
+SERVER_MODES = ['threads','aio']
 
 class GenericServer(grpcServicer):
   # initiate and run a server
@@ -31,21 +42,69 @@ class GenericServer(grpcServicer):
 
     # set False to force server termination at the next timeout opportunity
     self.going = True
+
+    # network addresses where the server listens for rpc requests
+    self.addresses = [NET_CONNECTION]
+    # gRPC channel options, like ('grpc.so_reuseport',1)
+    self.options = []
+    # seconds allowed for rpc's in progress to complete when stopping
+    self.grace = 0
     
     super().__init__()
 
-  def run(self):
+  def servicer(self):
+    # returns the object whose methods serve the rpc channels
+    # an inherited class may return some other object, for example
+    #   to route requests among the states of different clients
+    return self
+
+  def servicer_aio(self,executor):
+    # returns the object whose methods serve the rpc channels on
+    #   the asyncio server
+    # the methods of servicer() are run in executor unless an
+    #   inherited class returns an object with asynchronous methods
+    return self.servicer()
+
+  def run(self,mode=SERVER_MODE):
+    # mode = one of SERVER_MODES
 
-    s = grpc.server(futures.ThreadPoolExecutor(max_workers=10)) # instantiate server
-    grpcAddServicer(self,s) # add server to pool
-    s.add_insecure_port(NET_CONNECTION) # open network port to server
+    if mode not in SERVER_MODES:
+      raise ValueError("Server mode '{0}' is not one of {1}".format(mode,SERVER_MODES))
+    if mode == 'aio':
+      asyncio.run(self.run_aio())
+      return
+
+    s = grpc.server(
+      futures.ThreadPoolExecutor(max_workers=MAXIMUM_WORKERS),
+      options=self.options
+      ) # instantiate server
+    grpcAddServicer(self.servicer(),s) # add server to pool
+    for address in self.addresses:
+      s.add_insecure_port(address) # open network port to server
 
     # start server, stop when requested or following a timeout
-    elapsed = 0 # elapsed time in minutes
+    elapsed = 0 # elapsed time in seconds
     s.start()
-    while self.going and elapsed < MAXIMUM_SERVICE_TIME_IN_MINUTES:
-      time.sleep(60) # sleep for one minute
+    while self.going and elapsed < 60 * MAXIMUM_SERVICE_TIME_IN_MINUTES:
+      time.sleep(1)
       elapsed += 1
-    s.stop(0)
+    s.stop(self.grace).wait()
+
+  async def run_aio(self):
+    # as run(), but on the asyncio server
+    # blocking work is done in a thread pool, whose threads are
+    #   occupied only while that work is in progress
 
+    executor = futures.ThreadPoolExecutor(max_workers=MAXIMUM_WORKERS)
+    s = grpc.aio.server(migration_thread_pool=executor,options=self.options)
+    grpcAddServicer(self.servicer_aio(executor),s)
+    for address in self.addresses:
+      s.add_insecure_port(address)
 
+    elapsed = 0 # elapsed time in seconds
+    await s.start()
+    while self.going and elapsed < 60 * MAXIMUM_SERVICE_TIME_IN_MINUTES:
+      await asyncio.sleep(1)
+      elapsed += 1
+    await s.stop(self.grace)
+    executor.shutdown(wait=False)
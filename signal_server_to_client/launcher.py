@@ -0,0 +1,150 @@
+"""
+Launcher running the time-series server as several worker processes
+    sharing one network address (NET_CONNECTION) through SO_REUSEPORT,
+    so that the server is not bound to the interpreter lock of a
+    single process
+The kernel spreads client connections among the workers; all the
+    requests of a client go over its one connection, so its session
+    stays with one worker
+Each worker also listens on a private address, through which the
+    workers report their health to one another, so that 'health?'
+    sent to the shared address is answered for all the workers
+A worker which exits is restarted; SIGHUP restarts the workers one
+    at a time, each finishing its streams in progress; SIGTERM or
+    SIGINT stops all the workers in the same way
+
+Usage: python launcher.py [number of workers] ['threads' or 'aio']
+"""
+
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from PROTO_DEFINITIONS import *
+
+# number of worker processes
+WORKERS = os.cpu_count() or 1
+# host and first port of the private addresses of the workers
+PRIVATE_HOST = 'localhost'
+PRIVATE_PORT = 50100
+# seconds allowed for streams in progress to complete when a
+#   worker is stopped
+GRACE_PERIOD = 30
+# seconds between checks that the workers are running
+CHECK_INTERVAL = 1.
+
+# workers are started afresh rather than forked, so that no gRPC
+#   state is inherited from the launcher
+CONTEXT = multiprocessing.get_context('spawn')
+
+def private_address(i):
+    # private address of worker i
+    return '{0}:{1}'.format(PRIVATE_HOST,PRIVATE_PORT+i)
+
+def serve(i,workers,mode):
+    # body of worker process i
+    # workers = number of worker processes
+    # mode = 'threads' or 'aio', as for GenericServer.run()
+
+    import time_series_server as tss
+
+    s = tss.TimeSeriesServer()
+    s.addresses = [NET_CONNECTION, private_address(i)]
+    s.options = [('grpc.so_reuseport',1)]
+    s.grace = GRACE_PERIOD
+    s.peers = [private_address(k) for k in range(workers) if k != i]
+
+    def stop(signum,frame):
+        # stop accepting rpc's, and complete those in progress
+        s.going = False
+    signal.signal(signal.SIGTERM,stop)
+    # an interrupt from the terminal is handled by the launcher
+    signal.signal(signal.SIGINT,signal.SIG_IGN)
+
+    s.run(mode)
+
+class Launcher:
+    '''
+    Starts the worker processes and keeps them running
+    '''
+
+    def __init__(self,workers=WORKERS,mode='threads'):
+        # mode = 'threads' or 'aio', checked here rather than by each
+        #   worker, which would otherwise fail and be restarted forever
+
+        if mode not in ['threads','aio']:
+            raise ValueError("Server mode '{}' is not 'threads' or 'aio'".format(mode))
+        self.workers = workers
+        self.mode = mode
+        self.processes = [None] * workers
+        self.going = True
+        self.restarting = False # restart requested by SIGHUP?
+
+    def start(self,i):
+
+        p = CONTEXT.Process(target=serve,args=(i,self.workers,self.mode))
+        p.start()
+        self.processes[i] = p
+        print('\nWorker {0} started with pid {1}'.format(i,p.pid))
+
+    def stop(self,i):
+        # stops worker i once its streams in progress are complete
+
+        p = self.processes[i]
+        p.terminate() # SIGTERM
+        p.join(GRACE_PERIOD + CHECK_INTERVAL)
+        if p.is_alive():
+            p.kill()
+            p.join()
+
+    def restart(self):
+        # restarts the workers one at a time, so that the
+        #   others continue to serve clients meanwhile
+
+        for i in range(self.workers):
+            if not self.going: return
+            print('\nRestarting worker {}'.format(i))
+            self.stop(i)
+            self.start(i)
+
+    def run(self):
+
+        def shutdown(signum,frame):
+            self.going = False
+        def restart(signum,frame):
+            self.restarting = True
+        signal.signal(signal.SIGTERM,shutdown)
+        signal.signal(signal.SIGINT,shutdown)
+        signal.signal(signal.SIGHUP,restart)
+
+        for i in range(self.workers):
+            self.start(i)
+
+        while self.going:
+            time.sleep(CHECK_INTERVAL)
+            if self.restarting:
+                self.restarting = False
+                self.restart()
+            for i in range(self.workers):
+                if self.going and not self.processes[i].is_alive():
+                    print('\nWorker {0} exited with code {1}'.format(
+                        i,self.processes[i].exitcode))
+                    self.start(i)
+
+        # stop all the workers together
+        print('\nStopping workers')
+        for p in self.processes:
+            p.terminate()
+        for p in self.processes:
+            p.join(GRACE_PERIOD + CHECK_INTERVAL)
+            if p.is_alive():
+                p.kill()
+
+
+if __name__ == '__main__':
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    mode = sys.argv[2] if len(sys.argv) > 2 else 'threads'
+    Launcher(workers,mode).run()
@@ -6,21 +6,105 @@ Progammer David G Messerschmitt
 18 March 2018
 """
 import importlib
+import asyncio
 import json
+import os
+import threading
+import time
 import cmath
 from math import floor
 from pprint import pprint
 
+import numpy as np
+import grpc
+
 import buffer as buff
+import parameters as param
+import compression
+import frames
+import sizing
+import sessions
+import admission
+import credit
 import generic_server as gs
 
 from PROTO_DEFINITIONS import *
 
-# number of gRPC repeated fields, which affects network throughput
-# too small and there are a lot of small packets; too large and
-#   the network has to fragment the packets
-REPEATED_FIELD_COUNT = 10
+# bytes occupied on the wire by one sample in a repeated field
+# a float is 4 bytes; a Complex message adds tags and a length prefix
+REPEATED_SAMPLE_BYTES = {'real':4, 'complex':12}
+
+# gRPC algorithms for each choice of 'channel_compression'
+CHANNEL_COMPRESSION = {
+  'none' : grpc.Compression.NoCompression,
+  'gzip' : grpc.Compression.Gzip,
+  'deflate' : grpc.Compression.Deflate,
+  }
+
+# transport-layer parameters the client may include with 'set',
+#   together with their default values
+# these are separated from the generator parameters, and are never
+#   passed on to the time-series generator
+TRANSPORT_DEFAULTS = {
+  # 'repeated' = stream RealSample or ComplexSample messages
+  # 'packed' = stream Frame messages carrying raw bytes
+  'packing' : 'repeated',
+  # 'flat' = packed values are cut from a flat buffered stream
+  # 'aligned' = each message holds whole multiplexed frames, each
+  #   time-series tagged with its series index and frame number
+  'framing' : 'flat',
+  # precision of packed complex values, 'complex64' or 'complex128'
+  'complex_dtype' : 'complex64',
+  # True = stream values in the dtype declared by the generator
+  #   ('sample_dtype') rather than converting them to float
+  'native_dtype' : False,
+  # True = series declared by the generator as affine axes
+  #   (like sampling times) are synthesized by the client, not streamed
+  'implicit_axes' : False,
+  # 'none' = values are sent exactly
+  # 'int8' or 'int16' = floating-point values are quantized (lossy),
+  #   with a scale and offset chosen for each frame
+  'quantize' : 'none',
+  # lossless codec applied to each packed frame, one of compression.CODECS
+  'codec' : 'none',
+  # compression applied by gRPC to every message of the stream
+  'channel_compression' : 'none',
+  # budget of sample bytes per message (before any compression), which affects network throughput
+  # too small and per-message overhead dominates; too large and
+  #   the message must be fragmented and is slow to fill
+  'message_bytes' : 65536,
+  # longest time in seconds a message may take to fill or to drain,
+  #   so that slow or paced generators still flush promptly
+  'max_latency' : 0.1,
+  # number of frames generated ahead by a thread while earlier frames
+  #   are serialized and sent, 0 = frames are generated on demand
+  'prefetch' : 0,
+  # largest number of values held by the buffer of a flat stream,
+  #   which is then filled ahead by a thread of its own
+  #   0 = unbounded, filled on demand
+  'buffer_capacity' : 0,
+  }
 
+# seconds to wait for the health of a sibling worker process
+HEALTH_TIMEOUT = 1.
+
+# acceptable values of each transport-layer parameter
+# a list enumerates the choices, a tuple is the range (minimum,maximum)
+TRANSPORT_CHOICES = {
+  'packing' : ['repeated','packed'],
+  'framing' : ['flat','aligned'],
+  'complex_dtype' : frames.COMPLEX_DTYPES,
+  'native_dtype' : [False,True],
+  'implicit_axes' : [False,True],
+  'quantize' : ['none'] + list(frames.QUANTIZE_LIMITS.keys()),
+  'codec' : compression.CODECS,
+  'channel_compression' : ['none','gzip','deflate'],
+  # gRPC refuses messages larger than 4 MB by default
+  'message_bytes' : (64,4000000),
+  'max_latency' : (0.001,60.),
+  'prefetch' : (0,64),
+  'buffer_capacity' : (0,2**24),
+  }
 
 class StreamingServer(gs.GenericServer):
   
@@ -28,10 +112,47 @@ class StreamingServer(gs.GenericServer):
     
     super().__init__()
 
-    # a buffer to store signal values as they are generated
-    self.buff = buff.TimeSeriesBuffer(self)
+    # a buffer to store signal values as they are generated, in
+    #   a numpy ring buffer rather than lists
+    # its memory is limited to the budget of a session
+    self.buff = buff.ArrayTimeSeriesBuffer(self,admission.SESSION_MEMORY_BYTES)
 ##    self.generator = g
 
+    # nothing to stream until a client has configured this server
+    self.abort = True
+    # True once the current stream has ended early
+    self.cancelled = False
+    # context of the stream being served, so that the end of an
+    #   earlier stream (noticed late) cannot cancel a later one
+    self.serving = None
+    self._serving_lock = threading.Lock()
+    # held while a response of the stream is produced
+    self.producing = threading.Lock()
+
+    # private addresses of sibling worker processes sharing the
+    #   network address of this server, whose health is aggregated
+    self.peers = []
+
+    # reader of ranges of recorded signals for GetRange and
+    #   StreamRange, or None if this server has none
+    self.ranges = None
+
+    # credit granted by the client for the current stream,
+    #   if paced by the client
+    self.credits = None
+
+    # chooses the number of samples in each message, once configured
+    self.sizer = None
+
+  def servicer(self):
+    # each instance holds the state of a single client session,
+    #   so requests are routed to a new instance for each session
+    return SessionRouter(type(self),self.peers)
+
+  def servicer_aio(self,executor):
+    # as servicer(), for the asyncio server
+    return AsyncSessionRouter(type(self),self.peers,executor)
+
   # a method must be provided for each rpc channel that processes
   #   request and sends response as defined in .proto file
   # name of method == name of rpc channel
@@ -49,12 +170,22 @@ class StreamingServer(gs.GenericServer):
     # returns list containing
     #   response = dictonary containing response
     #   alert = string with any alert message
-    [response,alert] = self.dispatch(
-                          request.operation,
-                          json.loads(request.parameters)
-                          )
+    # request.values = typed alternative to request.parameters,
+    #   in which case the response is returned typed as well
+    typed = request.HasField('values')
+    if typed:
+      p = param.from_struct(request.values)
+    else:
+      p = json.loads(request.parameters)
+    [response,alert] = self.dispatch(request.operation,p)
     
     # transmit to client
+    if typed:
+      r = self.message.Info(alert=alert)
+      r.values.SetInParent() # present even if response is empty
+      r.values.update(response)
+      return r
+
     # store in a dictionary, with 'response' as a JSON-encoded string
     r = {
       'response':json.dumps(response),
@@ -62,6 +193,219 @@ class StreamingServer(gs.GenericServer):
       }
     return self.message.Info(**r)
 
+  def negotiate(self,p):
+    # separate transport-layer parameters from generator parameters
+    # p = parameter dictionary received from client with 'set'
+    # returns list containing
+    #   g = dictionary of generator parameters alone
+    #   alert = string with any alert message
+    # the agreed transport configuration is stored in self.transport
+
+    self.transport = TRANSPORT_DEFAULTS.copy()
+    g = {}
+    alert = ''
+    for field in p.keys():
+      if field not in self.transport:
+        g[field] = p[field]
+      elif self.acceptable(field,p[field]):
+        self.transport[field] = p[field]
+      else:
+        alert = 'Transport {0} = {1} not supported, using {2}'.format(
+          field,p[field],self.transport[field])
+
+    # frames can only be aligned if they are packed
+    if self.transport['packing'] != 'packed':
+      self.transport['framing'] = 'flat'
+    return [g,alert]
+
+  def acceptable(self,field,value):
+    # is value an acceptable choice of transport-layer parameter field?
+
+    choices = TRANSPORT_CHOICES[field]
+    if isinstance(choices,tuple):
+      # a range of counts (with integer bounds) takes only integers
+      if isinstance(value,bool) or not isinstance(value,(int,float)):
+        return False
+      if isinstance(choices[0],int) and not isinstance(value,int):
+        return False
+      return choices[0] <= value <= choices[1]
+    return value in choices
+
+  def configure_stream(self,data_type,wire_dtype):
+    # prepare for a new stream with the agreed transport
+    # data_type = 'real' or 'complex' as chosen by the generator
+    # wire_dtype = numpy dtype of packed values
+    # returns the largest number of samples in any message of a flat
+    #   stream, so that the client can preallocate
+    # a message of aligned or credited frames carries at least one
+    #   whole frame, so may be larger; stream_report() gives the
+    #   largest actually sent
+
+    # a bounded buffer is filled ahead of the stream by a thread of
+    #   its own, which waits (pausing the generator) while it is full
+    capacity = self.transport['buffer_capacity']
+    if capacity != getattr(self.buff,'capacity',0):
+      self.buff.stop()
+      budget = self.buff.budget
+      if capacity > 0:
+        self.buff = buff.BoundedTimeSeriesBuffer(
+          self,budget,capacity,on_high=self.buffer_high,on_low=self.buffer_low)
+      else:
+        self.buff = buff.ArrayTimeSeriesBuffer(self,budget)
+
+    # quantization applies only to packed floating-point values,
+    #   with a scale and offset for each multiplexed time-series
+    self.quantize = (
+      self.transport['packing'] == 'packed' and
+      self.transport['quantize'] != 'none' and
+      frames.quantizable(wire_dtype)
+      )
+    self.accuracy = frames.QuantizationAccuracy()
+    self.series_accuracy = {} # accuracy of each series, for aligned frames
+
+    # the numeric codec applies only to packed values
+    self.codec = 'none'
+    if self.transport['packing'] == 'packed':
+      self.codec = self.transport['codec']
+    self.raw_bytes = 0 # payload bytes before and after the codec
+    self.coded_bytes = 0
+
+    if self.quantize:
+      sample_bytes = frames.quantized_itemsize(
+        wire_dtype,self.transport['quantize'])
+    elif self.transport['packing'] == 'packed':
+      sample_bytes = np.dtype(wire_dtype).itemsize
+    else:
+      sample_bytes = REPEATED_SAMPLE_BYTES[data_type]
+
+    self.sizer = sizing.MessageSizer(
+      sample_bytes,
+      self.transport['message_bytes'],
+      self.transport['max_latency']
+      )
+    return self.sizer.maximum
+
+  def stream_report(self):
+    # returns a dictionary reporting on the most recent stream
+    #   'quantization' = accuracy of quantized values, if quantized
+    #   'quantization_by_series' = the same for each multiplexed
+    #     time-series, for aligned frames
+    #   'compression' = ratio achieved by the codec, if any
+    #   'message_samples' = largest number of samples actually sent in
+    #     one message, which for aligned or credited frames may exceed
+    #     the bound agreed for flat streams
+
+    r = {}
+    if self.sizer is not None:
+      r['message_samples'] = self.sizer.largest
+    if self.quantize:
+      r['quantization'] = self.accuracy.report()
+      if self.series_accuracy:
+        r['quantization_by_series'] = {}
+        for i in self.series_accuracy.keys():
+          # keys are strings, as a typed Struct response requires
+          r['quantization_by_series'][str(i)] = self.series_accuracy[i].report()
+    if self.credits is not None:
+      r['credit'] = self.credits.report()
+    if self.codec != 'none':
+      r['compression'] = {
+        'codec' : self.codec,
+        'raw_bytes' : self.raw_bytes,
+        'compressed_bytes' : self.coded_bytes,
+        'ratio' : self.raw_bytes / self.coded_bytes if self.coded_bytes else 1.
+        }
+    return r
+
+  def stats(self):
+    # returns a dictionary of the counters of the buffer of the
+    #   session, like its peak occupancy and the bytes it copied,
+    #   for sizing the frames and the prefetching of streams
+    return {'buffer' : self.buff.stats()}
+
+  def pack(self,pieces,sequence,series=None):
+    # pieces = list of numpy arrays of values to pack into one Frame,
+    #   each containing values of a single multiplexed time-series
+    # sequence = position of the message in the stream
+    # series = index of the time-series, if all pieces belong to one
+    # returns list containing
+    #   r = dictionary of Frame fields, quantized and coded as agreed
+    #   samples = number of values packed
+
+    if self.quantize:
+      # each piece is quantized with its own scale and offset
+      [r,recovered] = frames.quantize(
+        pieces,sequence,self.transport['quantize'],self.codec)
+      for i in range(len(pieces)):
+        self.accuracy.add(pieces[i],recovered[i])
+        if series is not None:
+          if series not in self.series_accuracy:
+            self.series_accuracy[series] = frames.QuantizationAccuracy()
+          self.series_accuracy[series].add(pieces[i],recovered[i])
+      samples = sum(r['segments'])
+    else:
+      vals = pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
+      r = frames.pack(vals,sequence,self.codec)
+      samples = len(vals)
+
+    # keep track of the compression achieved
+    self.raw_bytes += samples * self.sizer.sample_bytes
+    self.coded_bytes += len(r['payload'])
+    return [r,samples]
+
+  def claim(self,context):
+    # the stream of context is now the stream of this session
+    # context = None when a new stream is configured, by 'set' or
+    #   'resume', so that the end of any earlier stream is ignored
+    with self._serving_lock:
+      self.serving = context
+
+  def cancel(self,context=None):
+    # called, from any thread, when a stream ends for any reason,
+    #   including cancellation by the client, its deadline passing
+    #   or its connection being lost
+    # context = context of the stream which ended, ignored unless it
+    #   is still the stream of this session (None = whatever stream)
+    with self._serving_lock:
+      if context is not None and context is not self.serving:
+        return
+      self.halt()
+
+  def buffer_high(self):
+    # called when a bounded buffer fills above its high watermark,
+    #   so that a subclass can pause work of its own
+    pass
+
+  def buffer_low(self):
+    # called when a bounded buffer empties below its low watermark
+    pass
+
+  def halt(self):
+    # the buffer stops calling for values, so the stream and the
+    #   generator stop at the next opportunity
+    self.cancelled = True
+    self.buff.cancel()
+
+  def end(self,context):
+    # called once the stream of context has ended without completing,
+    #   so that what it holds (like a worker process) is released now
+    #   rather than at the next 'set', once any response being
+    #   produced is done
+    # nothing is done if the client has since configured another stream
+    with self._serving_lock:
+      if context is not self.serving:
+        return
+      self.halt()
+    with self.producing:
+      with self._serving_lock:
+        if context is self.serving and hasattr(self,'close'):
+          self.close()
+
+  def compress_channel(self,context):
+    # ask gRPC to compress the messages of this stream, if agreed
+    if self.transport['channel_compression'] != 'none':
+      context.set_compression(
+        CHANNEL_COMPRESSION[self.transport['channel_compression']])
+
   def RealTimeSeries(self,request,context):
 
     # responds to request for streamng of real values
@@ -69,17 +413,21 @@ class StreamingServer(gs.GenericServer):
 
     # do nothing if something has gone awry previously
     if self.abort: return
+    self.compress_channel(context)
 
     while True:
       
       # get a list of floating values to pass to gRPC
-      vals = self.buff.get(REPEATED_FIELD_COUNT)
-      if vals == []: break  # no more values to transmit
+      self.sizer.start()
+      vals = self.buff.get(self.sizer.count)
+      if len(vals) == 0: break  # no more values to transmit
+      self.sizer.filled(len(vals))
       
       # convert to an list of messages
       #   which will be transmitted as a repeated field
       r = {'sample' : vals}
       yield self.message.RealSample(**r)
+      self.sizer.sent()
       
   def ComplexTimeSeries(self,request,context):
 
@@ -88,16 +436,636 @@ class StreamingServer(gs.GenericServer):
 
     # do nothing if something has gone awry previously
     if self.abort: return
+    self.compress_channel(context)
 
     while True:
       
-      vals = self.buff.get(REPEATED_FIELD_COUNT)
-      if vals == []: break
+      self.sizer.start()
+      vals = self.buff.get(self.sizer.count)
+      if len(vals) == 0: break
+      self.sizer.filled(len(vals))
       
-      # convert to an array of Complex messages
-      for i in range(len(vals)):
-        r = {'real':vals[i].real,'imag':vals[i].imag}
-        vals[i] = self.message.Complex(**r)
-      r = {'sample' : vals}
+      # convert to a list of Complex messages
+      samples = [
+        self.message.Complex(real=v.real,imag=v.imag) for v in vals
+        ]
+      r = {'sample' : samples}
       yield self.message.ComplexSample(**r)
+      self.sizer.sent()
+
+  def FrameTimeSeries(self,request,context):
+
+    # responds to request for streaming of packed frames
+    # each frame carries a block of real or complex values as raw bytes,
+    #   so the buffer holds numpy arrays rather than lists
+
+    # do nothing if something has gone awry previously
+    if self.abort: return
+    self.compress_channel(context)
+
+    sequence = 0
+    while True:
+
+      # each piece holds values of a single multiplexed time-series
+      self.sizer.start()
+      pieces = self.buff.extract(self.sizer.count)
+      if len(pieces) == 0: break
+      [r,samples] = self.pack(pieces,sequence)
+      self.sizer.filled(samples)
+
+      sequence += 1
+      yield self.message.Frame(**r)
+      self.sizer.sent()
+
+  def AlignedTimeSeries(self,request,context):
+
+    # responds to request for streaming of whole multiplexed frames
+    # each time-series of a frame is packed into its own Frame, tagged
+    #   with series index and frame number, so neither end needs a
+    #   buffer to re-chunk values and gaps can be detected
+    # each message holds as many whole frames as the sizing allows
+
+    # do nothing if something has gone awry previously
+    if self.abort: return
+    self.compress_channel(context)
+
+    sequence = 0
+    number = 0 # frame number
+    # one frame of look-ahead, so that the final frame can be flagged
+    pending = self.frame()
+    while len(pending) > 0:
+
+      self.sizer.start()
+      r = {'series':[], 'sequence':sequence}
+      samples = 0
+      while len(pending) > 0 and samples < self.sizer.count:
+        samples += self.pack_frame(r['series'],pending,number,sequence)
+        number += 1
+        pending = self.frame()
+      r['final'] = len(pending) == 0
+      self.sizer.filled(samples)
+
+      sequence += 1
+      yield self.message.MultiplexedFrames(**r)
+      self.sizer.sent()
+
+  def pack_frame(self,series,pending,number,sequence):
+    # packs each time-series of a multiplexed frame into its own Frame
+    # series = list to which the Frame messages are appended
+    # pending = list of [series index, values] returned by frame()
+    # number = frame number; sequence = position of the message
+    # returns the number of values packed
+
+    samples = 0
+    for [i,vals] in pending:
+      [f,n] = self.pack([np.ravel(vals)],sequence,i)
+      f['shape'] = vals.shape
+      f['series_index'] = i
+      f['frame_number'] = number
+      series.append(self.message.Frame(**f))
+      samples += n
+    return samples
+
+  def CreditedTimeSeries(self,credits,context):
+
+    # responds to request for streaming of whole multiplexed frames,
+    #   as AlignedTimeSeries, but generating and sending frames only
+    #   against the credit granted by the client
+    # credits = credit.Credits receiving the Credit messages of the client
+    # the end of the time-series is flagged by a final message,
+    #   which may hold no frames, so no frame is generated ahead
+
+    # do nothing if something has gone awry previously
+    if self.abort: return
+    self.compress_channel(context)
+    self.credits = credits
+
+    sequence = 0
+    number = 0 # frame number
+    final = False
+    while not final:
+
+      # wait for credit, ending if the client grants no more
+      granted = credits.take(lambda: self.cancelled)
+      if granted == 0: break
+      size = credits.resize()
+      if size > 0 and not self.resize(size):
+        print('\nFrame size of {} time-samples not available'.format(size))
+
+      self.sizer.start()
+      r = {'series':[], 'sequence':sequence}
+      samples = 0
+      sent = 0
+      while sent < granted and samples < self.sizer.count:
+        pending = self.frame()
+        if len(pending) == 0:
+          final = True
+          break
+        samples += self.pack_frame(r['series'],pending,number,sequence)
+        number += 1
+        sent += 1
+      credits.spend(sent)
+      r['final'] = final
+      self.sizer.filled(samples)
+
+      sequence += 1
+      yield self.message.MultiplexedFrames(**r)
+      self.sizer.sent()
+
+  def resize(self,samples):
+    # changes the number of time-samples in each frame from the next
+    #   frame onwards, at the request of the client
+    # returns True if changed, which an inherited class may allow
+    return False
+
+  def OpenSession(self,request,context):
+
+    # responds to a request combining the choice of time-series generator,
+    #   the 'set' configuration and the streaming of the time-series
+    # request.parameters holds 'service_choice' along with the generator
+    #   and transport-layer parameters
+    # the time-series is streamed as whole multiplexed frames
+
+    typed = request.HasField('values')
+    if typed:
+      p = param.from_struct(request.values)
+    else:
+      p = json.loads(request.parameters)
+    p['packing'] = 'packed'
+    p['framing'] = 'aligned'
+    [response,alert] = self.dispatch('open',p)
+    # 'set' has released the stream, which this one is
+    self.claim(context)
+
+    # the configuration information goes first
+    r = self.message.Info(alert=alert)
+    if typed:
+      r.values.SetInParent()
+      r.values.update(response)
+    else:
+      r.response = json.dumps(response)
+    yield self.message.SessionMessage(info=r)
+
+    # followed by the time-series (nothing if something has gone awry)
+    for multiplexed in self.AlignedTimeSeries(request,context):
+      yield self.message.SessionMessage(frames=multiplexed)
+
+
+class SessionRouter(gs.grpcServicer):
+  '''
+  Serves the rpc channels for many clients concurrently, by routing
+    each request to the StreamingServer instance holding the state
+    (generator, parameters, buffer, transport) of its session
+  A session is opened by 'service_choice' or by OpenSession, and its
+    id is returned to the client in the sessions.SESSION_HEADER header
+  '''
+
+  def __init__(self,factory,peers=None):
+    # factory = StreamingServer class, instantiated for each session
+    # peers = private addresses of sibling worker processes, or None
+
+    # an instance holding no session, for operations like 'service_types?'
+    self.shared = factory()
+    self.message = self.shared.message
+    self.sessions = sessions.SessionTable(factory)
+    # limits on the streams served at once, and those waiting
+    self.admission = admission.Admission()
+
+    self.peers = [] if peers is None else peers
+    self.stubs = {} # stubs for the peers, made when first needed
+    self.started = time.time()
+
+  def open(self,context):
+    # opens a new session and sends its id to the client
+    # returns list containing id and state of the session,
+    #   or [None,None] if too many sessions are live
+
+    [sid,session] = self.sessions.open()
+    if session is not None:
+      context.send_initial_metadata(self.header(sid))
+    return [sid,session]
+
+  def header(self,sid):
+    # returns metadata header sending session id sid to the client
+    return ((sessions.SESSION_HEADER,sid),)
+
+  def MetaDataCoordination(self,request,context):
+
+    [session,response,opened] = self.route(request,context)
+    if opened is not None:
+      context.send_initial_metadata(self.header(opened))
+    if session is None:
+      return response
+    return session.MetaDataCoordination(request,context)
+
+  def route(self,request,context):
+    # finds the session to which a metadata request goes, opening
+    #   a new session for 'service_choice' if the client has none
+    # returns list containing
+    #   session = state of the session, or None if the request
+    #     is answered by response alone
+    #   response = Info message answering the request
+    #   opened = id of a newly opened session, to be sent to the client
+
+    sid = sessions.session_id(context)
+    op = request.operation
+
+    if op == 'service_types?':
+      return [self.shared,None,None]
+
+    if op == 'health?':
+      return [None,self.reply(request,self.health(self.parameters(request))),None]
+
+    if op == 'close':
+      # the client has no further use for its session
+      self.sessions.close(sid)
+      return [None,self.refusal(request,''),None]
+
+    session = None
+    if sid is not None:
+      session = self.sessions.find(sid)
+    if session is not None:
+      return [session,None,None]
+
+    if op != 'service_choice':
+      return [None,self.refusal(request,'Session unknown or expired'),None]
+    [sid,session] = self.sessions.open()
+    if session is None:
+      return [None,self.refusal(request,admission.retry_message()),None]
+    return [session,None,sid]
+
+  def refusal(self,request,alert):
+    # returns an Info message with an empty response and alert
+    return self.reply(request,{},alert)
+
+  def reply(self,request,response,alert=''):
+    # returns an Info message with dictionary response and alert,
+    #   typed if the request was typed
+
+    if request.HasField('values'):
+      r = self.message.Info(alert=alert)
+      r.values.SetInParent()
+      r.values.update(response)
+      return r
+    return self.message.Info(alert=alert,response=json.dumps(response))
+
+  def unchosen(self):
+    # details of the INVALID_ARGUMENT status of an OpenSession
+    #   request choosing no generator
+    return "Parameter 'service_choice' must be specified"
+
+  def parameters(self,request):
+    # returns the parameter dictionary of a Config message
+    if request.HasField('values'):
+      return param.from_struct(request.values)
+    return json.loads(request.parameters)
+
+  def health(self,p):
+    # returns dictionary reporting the health of this server
+    # p = parameters of 'health?', where 'scope' = 'worker' asks
+    #   for this worker process alone, rather than aggregated over
+    #   the sibling worker processes sharing its network address
+
+    r = {
+      'pid' : os.getpid(),
+      'uptime' : time.time() - self.started,
+      'sessions' : self.sessions.count(),
+      'streams' : self.sessions.streams()
+      }
+    r.update(self.admission.report())
+    if p.get('scope') == 'worker':
+      return r
+
+    workers = [r]
+    unreachable = 0
+    for address in self.peers:
+      if address not in self.stubs:
+        self.stubs[address] = gs.grpcStub(
+          grpc.insecure_channel(address))
+      s = self.message.Config(
+        operation='health?',parameters=json.dumps({'scope':'worker'}))
+      try:
+        i = self.stubs[address].MetaDataCoordination(s,timeout=HEALTH_TIMEOUT)
+        workers.append(json.loads(i.response))
+      except grpc.RpcError:
+        unreachable += 1
+
+    return {
+      'workers' : workers,
+      'unreachable' : unreachable,
+      'sessions' : sum(w['sessions'] for w in workers),
+      'streams' : sum(w['streams'] for w in workers),
+      'queue_depth' : sum(w['queue_depth'] for w in workers),
+      'rejected' : sum(w['rejected'] for w in workers)
+      }
+
+  def stream(self,name,request,context):
+    # passes a streaming request to the session of the client
+    # name = name of the rpc channel
+
+    [sid,session] = self.find(context)
+    if session is None:
+      context.abort(grpc.StatusCode.NOT_FOUND,'Session unknown or expired')
+
+    yield from self.serve(sid,session,getattr(session,name)(request,context),context)
+
+  def find(self,context):
+    # returns list containing id and state of the session of the
+    #   client, the state being None if unknown or expired
+
+    sid = sessions.session_id(context)
+    if sid is None:
+      return [None,None]
+    return [sid,self.sessions.find(sid)]
+
+  def serve(self,sid,session,responses,context):
+    # yields the responses of a stream of session sid, once admitted
+    # the session is not evicted while streaming, however long
+
+    if not self.admission.acquire():
+      self.exhausted(context,admission.retry_message())
+
+    # when the stream ends early (cancelled by the client, its deadline
+    #   passed or its connection lost) the generator is stopped,
+    #   unless the client has since configured another stream
+    session.claim(context)
+    completed = False
+    def ended():
+      session.cancel(context)
+      if not completed:
+        # the responses are no longer asked for, so what the stream
+        #   holds is released by a thread of its own
+        threading.Thread(target=session.end,args=(context,),daemon=True).start()
+    context.add_callback(ended)
+    self.sessions.streaming(sid,1)
+    try:
+      while True:
+        r = self.produce(session,responses)
+        if r is None: break
+        yield r
+      completed = True
+    except buff.BudgetExceeded as e:
+      context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,str(e))
+    finally:
+      self.sessions.streaming(sid,-1)
+      self.admission.release()
+
+  def produce(self,session,responses):
+    # returns the next response of a stream of session, or None
+    with session.producing:
+      return next(responses,None)
+
+  def exhausted(self,context,details):
+    # rejects a request for lack of resources, with a hint
+    #   to the client of when to retry
+    context.set_trailing_metadata(self.retry_after())
+    context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,details)
+
+  def retry_after(self):
+    # returns metadata header with the retry hint
+    return ((admission.RETRY_HEADER,str(admission.RETRY_AFTER)),)
+
+  def RealTimeSeries(self,request,context):
+    return self.stream('RealTimeSeries',request,context)
+
+  def ComplexTimeSeries(self,request,context):
+    return self.stream('ComplexTimeSeries',request,context)
+
+  def FrameTimeSeries(self,request,context):
+    return self.stream('FrameTimeSeries',request,context)
+
+  def AlignedTimeSeries(self,request,context):
+    return self.stream('AlignedTimeSeries',request,context)
+
+  def CreditedTimeSeries(self,request_iterator,context):
+
+    # the Credit messages of the client are received by a thread
+    #   of their own, while this thread produces the stream
+    credits = credit.Credits()
+    threading.Thread(target=credits.receive,args=(request_iterator,),daemon=True).start()
+    return self.stream('CreditedTimeSeries',credits,context)
+
+  def OpenSession(self,request,context):
+
+    # each call opens a session of its own, which remains
+    #   available afterwards for operations like 'stream_report?'
+    if 'service_choice' not in self.parameters(request):
+      context.abort(grpc.StatusCode.INVALID_ARGUMENT,self.unchosen())
+    [sid,session] = self.open(context)
+    if session is None:
+      self.exhausted(context,admission.retry_message())
+    yield from self.serve(sid,session,session.OpenSession(request,context),context)
+
+  # ranges of recorded signals are read without any session, by
+  #   the reader shared by all sessions
+
+  def get_range(self,request):
+    # returns Frame message with the range of samples of a GetRange request
+    # raises OSError or ValueError if the range cannot be read
+
+    reader = self.shared.ranges
+    vals = reader.read(request.file,request.start,request.count,request.stride)
+    return self.message.Frame(**frames.pack(vals,0))
+
+  def stream_range(self,request):
+    # yields Frame messages with the range of samples of a StreamRange
+    #   request, read from the file as they are sent
+    # raises OSError or ValueError if the range cannot be read
+
+    reader = self.shared.ranges
+    sequence = 0
+    for vals in reader.frames(request.file,request.start,request.count,
+                              request.stride,request.frame):
+      yield self.message.Frame(**frames.pack(vals,sequence))
+      sequence += 1
+
+  def range_status(self,request,error):
+    # returns list containing the status code and details
+    #   for a range of request which cannot be read
+    if isinstance(error,FileNotFoundError):
+      return [grpc.StatusCode.NOT_FOUND,'File {} not found'.format(request.file)]
+    return [grpc.StatusCode.INVALID_ARGUMENT,str(error)]
+
+  def GetRange(self,request,context):
+
+    if self.shared.ranges is None:
+      context.abort(grpc.StatusCode.UNIMPLEMENTED,'No recorded signals')
+    try:
+      return self.get_range(request)
+    except (OSError,ValueError) as e:
+      context.abort(*self.range_status(request,e))
+
+  def StreamRange(self,request,context):
+
+    if self.shared.ranges is None:
+      context.abort(grpc.StatusCode.UNIMPLEMENTED,'No recorded signals')
+    if not self.admission.acquire():
+      self.exhausted(context,admission.retry_message())
+    try:
+      yield from self.stream_range(request)
+    except (OSError,ValueError) as e:
+      context.abort(*self.range_status(request,e))
+    finally:
+      self.admission.release()
+
+
+class AsyncSessionRouter(SessionRouter):
+  '''
+  As SessionRouter, but serving the rpc channels on the asyncio
+    server, so that idle or paced streams occupy no thread
+  The time-series of each session is still produced by the ordinary
+    (blocking) methods of its StreamingServer instance, but each
+    message is produced in a thread of the executor, so that calls to
+    the generator never block the event loop
+  '''
+
+  def __init__(self,factory,peers,executor):
+    # executor = concurrent.futures executor running blocking calls
+
+    super().__init__(factory,peers)
+    self.executor = executor
+    # sessions removed are closed in the executor, off the event loop
+    self.sessions.run = executor.submit
+
+  async def call(self,f,*args):
+    # runs f(*args) in the executor and returns its result
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(self.executor,f,*args)
+
+  async def MetaDataCoordination(self,request,context):
+
+    if request.operation == 'health?':
+      # may wait on sibling worker processes
+      p = self.parameters(request)
+      return self.reply(request,await self.call(self.health,p))
+
+    [session,response,opened] = self.route(request,context)
+    if opened is not None:
+      await context.send_initial_metadata(self.header(opened))
+    if session is None:
+      return response
+    return await self.call(session.MetaDataCoordination,request,context)
+
+  async def stream(self,name,request,context):
+    # passes a streaming request to the session of the client
+
+    [sid,session] = self.find(context)
+    if session is None:
+      await context.abort(grpc.StatusCode.NOT_FOUND,'Session unknown or expired')
+
+    async for r in self.relay(sid,session,getattr(session,name)(request,context),context):
+      yield r
+
+  async def relay(self,sid,session,responses,context):
+    # as serve(), but each response is produced in the executor
+    # responses = (blocking) iterator over the responses
+
+    # a request waiting for admission occupies a thread of the executor
+    if not await self.call(self.admission.acquire):
+      await self.exhausted_aio(context,admission.retry_message())
+
+    session.claim(context)
+    context.add_done_callback(lambda c: session.cancel(context))
+    self.sessions.streaming(sid,1)
+    completed = False
+    try:
+      while True:
+        r = await self.call(self.produce,session,responses)
+        if r is None:
+          completed = True
+          break
+        yield r
+    except buff.BudgetExceeded as e:
+      await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,str(e))
+    finally:
+      self.sessions.streaming(sid,-1)
+      self.admission.release()
+      if not completed:
+        # a response may still be being produced in the executor
+        self.executor.submit(self.finish,session,responses,context)
+
+  def finish(self,session,responses,context):
+    # closes the responses of a stream which has not completed, once
+    #   any response being produced is done, and ends the stream
+    with session.producing:
+      responses.close()
+    session.end(context)
+
+  async def exhausted_aio(self,context,details):
+    # as exhausted(), on the asyncio server
+    context.set_trailing_metadata(self.retry_after())
+    await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,details)
+
+  async def RealTimeSeries(self,request,context):
+    async for r in self.stream('RealTimeSeries',request,context):
+      yield r
+
+  async def ComplexTimeSeries(self,request,context):
+    async for r in self.stream('ComplexTimeSeries',request,context):
+      yield r
+
+  async def FrameTimeSeries(self,request,context):
+    async for r in self.stream('FrameTimeSeries',request,context):
+      yield r
+
+  async def AlignedTimeSeries(self,request,context):
+    async for r in self.stream('AlignedTimeSeries',request,context):
+      yield r
+
+  async def CreditedTimeSeries(self,request_iterator,context):
+
+    # the Credit messages of the client are received by a task
+    #   of their own, while the stream is produced in the executor
+    credits = credit.Credits()
+    async def receive():
+      try:
+        async for c in request_iterator:
+          credits.grant(c)
+      finally:
+        credits.close()
+    task = asyncio.get_running_loop().create_task(receive())
+    try:
+      async for r in self.stream('CreditedTimeSeries',credits,context):
+        yield r
+    finally:
+      task.cancel()
+
+  async def OpenSession(self,request,context):
+
+    if 'service_choice' not in self.parameters(request):
+      await context.abort(grpc.StatusCode.INVALID_ARGUMENT,self.unchosen())
+    [sid,session] = self.sessions.open()
+    if session is None:
+      await self.exhausted_aio(context,admission.retry_message())
+    await context.send_initial_metadata(self.header(sid))
+    async for r in self.relay(sid,session,session.OpenSession(request,context),context):
+      yield r
+
+  async def GetRange(self,request,context):
+
+    if self.shared.ranges is None:
+      await context.abort(grpc.StatusCode.UNIMPLEMENTED,'No recorded signals')
+    # reading the file may wait on the disk
+    try:
+      return await self.call(self.get_range,request)
+    except (OSError,ValueError) as e:
+      await context.abort(*self.range_status(request,e))
+
+  async def StreamRange(self,request,context):
 
+    if self.shared.ranges is None:
+      await context.abort(grpc.StatusCode.UNIMPLEMENTED,'No recorded signals')
+    if not await self.call(self.admission.acquire):
+      await self.exhausted_aio(context,admission.retry_message())
+    responses = self.stream_range(request)
+    try:
+      while True:
+        r = await self.call(next,responses,None)
+        if r is None: break
+        yield r
+    except (OSError,ValueError) as e:
+      await context.abort(*self.range_status(request,e))
+    finally:
+      if not responses.gi_running:
+        responses.close()
+      self.admission.release()
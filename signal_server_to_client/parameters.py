@@ -6,6 +6,28 @@ Progammer David G Messerschmitt
 4 April 2018
 """
 
+from google.protobuf import json_format
+
+def from_struct(s):
+    # s = google.protobuf Struct received in a message
+    # returns the equivalent parameter dictionary
+    # a Struct stores every number as a double, so numbers
+    #   with integral values are restored as int
+
+    return integral(json_format.MessageToDict(s))
+
+def integral(v):
+    # returns v with integral-valued floats replaced by int,
+    #   looking inside dictionaries and lists
+
+    if isinstance(v,float) and v.is_integer():
+        return int(v)
+    if isinstance(v,dict):
+        return {k:integral(v[k]) for k in v.keys()}
+    if isinstance(v,list):
+        return [integral(x) for x in v]
+    return v
+
 class Parameters:
   # class to store and manage parameter dictionaries
 
@@ -37,6 +59,16 @@ class Parameters:
     self.t.update(c)
     return
 
+  def unknown(self,c):
+    # checks dictionary c of values chosen by the client against
+    #   the parameter metadata
+    # returns either None or the name of the first encountered
+    #   parameter which the generator does not have
+    for field in c.keys():
+      if field not in self.p:
+        return field
+    return None
+
   def complete(self):
     # checks final parameters r to make sure there are no missing values
     # returns either None or the name of the first encountered missing parameter
@@ -0,0 +1,129 @@
+"""
+Prefetching of frames from a time-series generator
+A background thread calls the generator ahead of the stream, by up to a
+    given number of frames, so that the generator computes the next
+    frames while the previous ones are serialized and sent
+The generator must return new arrays from each call (rather than
+    overwriting the arrays of a previous frame), as all the examples do
+"""
+
+import queue
+import threading
+import time
+
+# seconds between checks for cancellation while waiting on the queue
+POLL_INTERVAL = 0.1
+
+class Prefetcher:
+    '''
+    Runs produce() in a thread, keeping up to depth frames ready
+    get() returns the frames in order, ending with the empty list
+        returned by produce() when the generator is exhausted
+    pause() and resume() stop and restart the producing of frames
+        ahead, as when the stream is already buffered far enough ahead
+    '''
+
+    def __init__(self,produce,depth):
+        # produce = function returning the next frame, or [] when exhausted
+        # depth = largest number of frames produced ahead
+
+        self.produce = produce
+        self.depth = depth
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = False
+        self._finished = False
+        self._running = threading.Event() # cleared while paused
+        self._running.set()
+
+        # statistics for the stream report
+        self.frames = 0 # frames produced
+        self.consumer_waits = 0 # times get() found no frame ready
+        self.wait_seconds = 0. # total time get() waited
+        self.producer_waits = 0 # times the thread found the queue full
+        self.pauses = 0 # times paused
+
+        self._thread = threading.Thread(target=self.run,daemon=True)
+        self._thread.start()
+
+    def run(self):
+        # body of the thread
+
+        while not self._stop:
+            if not self._running.wait(POLL_INTERVAL):
+                continue
+            try:
+                vals_list = self.produce()
+            except Exception as e:
+                vals_list = e # raised again by get()
+            if self._queue.full():
+                self.producer_waits += 1
+            while not self._stop:
+                try:
+                    self._queue.put(vals_list,timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    pass
+            if isinstance(vals_list,Exception) or len(vals_list) == 0:
+                return
+            self.frames += 1
+
+    def get(self):
+        # returns the next frame, waiting if it is not yet ready
+        # returns [] once cancelled
+
+        if self._queue.empty() and not self._finished:
+            self.consumer_waits += 1
+        start = time.perf_counter()
+        while not self._finished:
+            try:
+                vals_list = self._queue.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if self._stop:
+                    self._finished = True
+        self.wait_seconds += time.perf_counter() - start
+        if self._finished:
+            return []
+
+        if isinstance(vals_list,Exception):
+            self._finished = True
+            raise vals_list
+        if len(vals_list) == 0:
+            self._finished = True
+        return vals_list
+
+    def pause(self):
+        # asks the thread to produce no more frames until resumed,
+        #   after the frame in progress
+        # may be called from any thread
+        if self._running.is_set():
+            self.pauses += 1
+        self._running.clear()
+
+    def resume(self):
+        # lets a paused thread produce frames again
+        # may be called from any thread
+        self._running.set()
+
+    def cancel(self):
+        # asks the thread to stop after the frame in progress
+        # may be called from any thread
+        self._stop = True
+
+    def close(self):
+        # stops the thread, discarding any frames produced ahead
+
+        self.cancel()
+        self._thread.join()
+
+    def report(self):
+        # returns dictionary of statistics for the stream report
+
+        return {
+            'depth' : self.depth,
+            'frames' : self.frames,
+            'consumer_waits' : self.consumer_waits,
+            'wait_seconds' : self.wait_seconds,
+            'producer_waits' : self.producer_waits,
+            'pauses' : self.pauses
+            }
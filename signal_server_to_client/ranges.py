@@ -0,0 +1,144 @@
+"""
+Random access to ranges of samples of recorded SigMF signal files,
+    for viewers which pan and zoom through a recording with many small
+    reads, each served straight from the memory-mapped file without
+    configuring a time-series generator
+Each sample of a complex recording is returned as its [real, imag]
+    components, and each sample of a real recording as a single value,
+    in the dtype in which the file stores them (like int16 for
+    'ci16_le'), so that values are neither converted nor scaled
+"""
+
+import collections
+import os
+import threading
+
+import numpy as np
+
+import time_series_generators as tsg
+
+# directory holding the recordings, relative to this code, within
+#   which the file of each request is found
+RANGE_DIRECTORY = 'data'
+# extension of the signal data files which may be read
+DATA_EXTENSION = '.sigmf-data'
+# largest number of files kept memory-mapped, the least recently
+#   read being unmapped first
+MAXIMUM_OPEN_FILES = 32
+# largest number of bytes returned by one GetRange, which must fit
+#   in a gRPC message (4 MB by default); longer ranges use StreamRange
+MAXIMUM_RANGE_BYTES = 4000000
+# bytes of samples in each Frame of StreamRange, unless the client asks
+#   for some other number of samples per Frame
+RANGE_FRAME_BYTES = 65536
+
+class RangeReader:
+    '''
+    Reads ranges of samples of the files in a directory, keeping
+        the most recently read files memory-mapped
+    A file which has changed (like a recording in progress) is
+        mapped afresh
+    Methods may be called concurrently from the threads serving RPCs
+    '''
+
+    def __init__(self,directory=None,limit=MAXIMUM_OPEN_FILES):
+        # directory = directory holding the recordings
+        # limit = largest number of files kept memory-mapped
+
+        if directory is None:
+            directory = os.path.join(
+                os.path.dirname(os.path.realpath(__file__)),RANGE_DIRECTORY)
+        self.directory = os.path.realpath(directory)
+        self.limit = limit
+
+        self._lock = threading.Lock()
+        # path -> [modification time and size, samples]
+        self._maps = collections.OrderedDict()
+
+    def path(self,file):
+        # returns the path of file, which must be a signal data file
+        #   (not, say, its meta file) lying within the directory
+
+        path = os.path.realpath(os.path.join(self.directory,file))
+        if os.path.commonpath([path,self.directory]) != self.directory:
+            raise ValueError('File {} is outside the directory of recordings'.format(file))
+        if not path.endswith(DATA_EXTENSION):
+            raise ValueError('File {0} is not a {1} file'.format(file,DATA_EXTENSION))
+        return path
+
+    def samples(self,file):
+        # returns a memory-mapped numpy array of the samples of file,
+        #   with shape [number of samples, 2] for a complex recording,
+        #   or [number of samples] for a real one
+
+        path = self.path(file)
+        stat = os.stat(path) # FileNotFoundError if absent
+        version = (stat.st_mtime_ns,stat.st_size)
+
+        with self._lock:
+            if path in self._maps and self._maps[path][0] == version:
+                self._maps.move_to_end(path)
+                return self._maps[path][1]
+
+        [_, dtype, is_complex] = tsg.sigmf_datatype(path)
+        width = 2 if is_complex else 1 # components of each sample
+        if stat.st_size < width * dtype.itemsize:
+            samples = np.zeros((0,width),dtype=dtype) # cannot be mapped
+        else:
+            samples = np.memmap(path,dtype=dtype,mode='r')
+            samples = samples[:samples.size - samples.size % width].reshape(-1,width)
+        if not is_complex:
+            samples = samples[:,0]
+
+        with self._lock:
+            self._maps[path] = [version, samples]
+            self._maps.move_to_end(path)
+            while len(self._maps) > self.limit:
+                self._maps.popitem(last=False)
+        return samples
+
+    def select(self,file,start,count,stride):
+        # returns a view of the samples start, start+stride, ... of file,
+        #   at most count of them (all those remaining if count is 0),
+        #   and fewer if the file ends first
+
+        stride = max(stride,1)
+        samples = self.samples(file)
+        stop = samples.shape[0] if count == 0 else start + count * stride
+        return samples[start:stop:stride]
+
+    def read(self,file,start,count,stride):
+        # returns numpy array of the samples selected, as for select(),
+        #   which must fit in one message
+
+        vals = self.select(file,start,count,stride)
+        if vals.nbytes > MAXIMUM_RANGE_BYTES:
+            raise ValueError(
+                'Range of {0} bytes exceeds {1} bytes, use StreamRange'.format(
+                    vals.nbytes,MAXIMUM_RANGE_BYTES))
+        return vals
+
+    def frames(self,file,start,count,stride,frame=0):
+        # yields numpy arrays of successive blocks of the samples
+        #   selected, as for select(), of frame samples each
+        #   (or RANGE_FRAME_BYTES of samples if frame is 0)
+
+        vals = self.select(file,start,count,stride)
+        sample_bytes = vals.dtype.itemsize * int(np.prod(vals.shape[1:]))
+        if frame == 0:
+            frame = max(RANGE_FRAME_BYTES // sample_bytes,1)
+        frame = min(frame,MAXIMUM_RANGE_BYTES // sample_bytes)
+        for i in range(0,vals.shape[0],frame):
+            yield vals[i:i+frame]
+
+_reader = None
+_reader_lock = threading.Lock()
+
+def reader():
+    # returns the reader of this server, created on first use,
+    #   so that every session shares its memory-mapped files
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = RangeReader()
+        return _reader
@@ -3,6 +3,8 @@
 Runs protoc with the gRPC plugin to generate messages and gRPC stubs
 """
 
+import os
+import grpc_tools
 from grpc_tools import protoc
     
 # this file contains definitions of SERVICE_NAME,
@@ -12,10 +14,15 @@ from PROTO_DEFINITIONS import *
 
 subDirectory = '.'
 
+# protocol buffer definitions distributed with grpc_tools, like
+#   google/protobuf/struct.proto, which the .proto file imports
+wellKnownTypes = os.path.join(os.path.dirname(grpc_tools.__file__),'_proto')
+
 outcome = protoc.main(
     (
 	'',
 	'--proto_path=.',
+	'--proto_path=' + wellKnownTypes,
 	'--python_out=' + subDirectory,
 	'--grpc_python_out=' + subDirectory,
 	'./' + PROTO_FILE + '.proto',
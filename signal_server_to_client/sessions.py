@@ -0,0 +1,141 @@
+"""
+Table of client sessions held by a server, so that many clients can
+    be served concurrently, each with its own state
+A session is identified by an id which the server returns to the
+    client in the gRPC metadata header SESSION_HEADER, and which the
+    client then includes with each of its requests
+Idle sessions are evicted after a time-to-live, and the number of
+    live sessions is capped
+"""
+
+import threading
+import time
+import uuid
+
+# name of the gRPC metadata header carrying the session id
+SESSION_HEADER = 'session-id'
+
+# seconds a session may remain idle before it is evicted
+SESSION_TTL = 600
+# largest number of live sessions
+MAXIMUM_SESSIONS = 64
+
+def session_id(context):
+    # returns the session id among the metadata sent by the client,
+    #   or None if the client has not sent one
+
+    for key, value in context.invocation_metadata():
+        if key == SESSION_HEADER:
+            return value
+    return None
+
+class SessionTable:
+    '''
+    Keeps the state of each session, created on demand by a factory
+    Sessions in use by a stream are never evicted, however long the stream
+    Methods may be called concurrently from the threads serving RPCs
+    '''
+
+    def __init__(self,factory,ttl=SESSION_TTL,limit=MAXIMUM_SESSIONS,run=None):
+        # factory = function returning the state of a new session
+        # ttl = seconds a session may remain idle before eviction
+        # limit = largest number of live sessions
+        # run = function running a blocking call, like the close() of
+        #   a session removed, or None to call it at once
+
+        self.factory = factory
+        self.ttl = ttl
+        self.limit = limit
+        self.run = run
+
+        self._lock = threading.Lock()
+        self._sessions = {} # session id -> state
+        self._last_used = {} # session id -> time of last use
+        self._streams = {} # session id -> number of streams in progress
+
+    def open(self):
+        # returns list containing id and state of a new session,
+        #   or [None,None] if the limit on live sessions has been reached
+
+        with self._lock:
+            removed = self.evict()
+            if len(self._sessions) >= self.limit:
+                [sid, state] = [None, None]
+            else:
+                sid = uuid.uuid4().hex
+                state = self.factory()
+                self._sessions[sid] = state
+                self._last_used[sid] = time.monotonic()
+                self._streams[sid] = 0
+                print('\nSession {0} opened ({1} live)'.format(sid,len(self._sessions)))
+        self.release(removed)
+        return [sid, state]
+
+    def find(self,sid):
+        # returns the state of session sid, or None if the session
+        #   is unknown or has been evicted
+
+        with self._lock:
+            removed = self.evict()
+            state = self._sessions.get(sid)
+            if state is not None:
+                self._last_used[sid] = time.monotonic()
+        self.release(removed)
+        return state
+
+    def close(self,sid):
+        # ends session sid at the request of the client
+
+        with self._lock:
+            removed = [self.remove(sid)] if sid in self._sessions else []
+        self.release(removed)
+
+    def streaming(self,sid,delta):
+        # delta = +1 when a stream of session sid starts, -1 when it ends
+
+        with self._lock:
+            if sid in self._sessions:
+                self._streams[sid] += delta
+                self._last_used[sid] = time.monotonic()
+
+    def evict(self):
+        # removes sessions idle for longer than the time-to-live
+        # must be called with the lock held
+        # returns list of the states removed, to be released
+
+        now = time.monotonic()
+        removed = []
+        for sid in list(self._sessions.keys()):
+            if self._streams[sid] == 0 and now - self._last_used[sid] > self.ttl:
+                print('\nSession {} evicted after idling'.format(sid))
+                removed.append(self.remove(sid))
+        return removed
+
+    def remove(self,sid):
+        # removes session sid, returning its state
+        # must be called with the lock held
+        del self._last_used[sid]
+        del self._streams[sid]
+        return self._sessions.pop(sid)
+
+    def release(self,states):
+        # states = states of sessions removed, which may hold resources
+        #   (like a worker process) whose release may wait on threads
+        #   and processes, so it is done after the lock is released
+
+        for state in states:
+            if hasattr(state,'close'):
+                if self.run is None:
+                    state.close()
+                else:
+                    self.run(state.close)
+
+    def count(self):
+        # number of live sessions
+        with self._lock:
+            return len(self._sessions)
+
+    def streams(self):
+        # number of streams in progress
+        with self._lock:
+            return sum(self._streams.values())
@@ -0,0 +1,83 @@
+"""
+Choice of the number of samples carried by each streamed message
+The number is bounded by a byte budget per message, and is tuned at
+    runtime so that a message takes no longer than a maximum latency
+    to be filled by the generator or drained by the client
+"""
+
+import time
+
+# number of samples in the first message of a stream; the count then
+#   grows geometrically as long as the latency bound is respected
+INITIAL_MESSAGE_SAMPLES = 64
+# growth of the count from one message to the next; must be > 1
+MESSAGE_GROWTH_FACTOR = 2
+# weight of the newest measurement in the smoothed rates
+RATE_SMOOTHING = 0.25
+
+class MessageSizer:
+    '''
+    Tracks the rate at which a stream is filled by the time-series
+        generator and drained by the client, and chooses the number
+        of samples for the next message accordingly
+    The stream calls start() before fetching samples for a message,
+        filled() once they are in hand, and sent() once the message
+        has been accepted by gRPC (which blocks when the client
+        is not keeping up)
+    '''
+
+    def __init__(self,sample_bytes,message_bytes,max_latency):
+        # sample_bytes = bytes occupied on the wire by one sample
+        # message_bytes = budget of bytes per message
+        # max_latency = longest time in seconds a message should take
+        #   to be filled or to be drained
+
+        self.sample_bytes = sample_bytes
+        # largest number of samples which fits in the byte budget
+        self.maximum = max(1, int(message_bytes // sample_bytes))
+        self.max_latency = max_latency
+
+        self.count = min(self.maximum,INITIAL_MESSAGE_SAMPLES)
+        # largest number of samples actually sent in one message, which
+        #   exceeds maximum when a message must carry a whole frame
+        self.largest = 0
+        self.fill_rate = None # smoothed samples per second from generator
+        self.drain_rate = None # smoothed samples per second to client
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def filled(self,samples):
+        # samples = number of samples actually obtained for this message
+        self._samples = samples
+        self._filled = time.perf_counter()
+        self.largest = max(self.largest,samples)
+
+    def sent(self):
+        # retune the count for the next message from the
+        #   times taken to fill and drain this message
+
+        now = time.perf_counter()
+        self.fill_rate = self.smooth(
+            self.fill_rate, self._samples, self._filled - self._start)
+        self.drain_rate = self.smooth(
+            self.drain_rate, self._samples, now - self._filled)
+
+        # grow toward the byte budget, but no further than
+        #   the latency bound at either end of the stream allows
+        limit = self.maximum
+        for rate in [self.fill_rate, self.drain_rate]:
+            if rate is not None:
+                limit = min(limit, rate * self.max_latency)
+        self.count = max(1, int(min(self.count * MESSAGE_GROWTH_FACTOR, limit)))
+
+    def smooth(self,rate,samples,elapsed):
+        # returns exponentially smoothed rate in samples per second
+        # a measurement too short to time leaves the rate unchanged
+
+        if elapsed <= 0.:
+            return rate
+        measured = samples / elapsed
+        if rate is None:
+            return measured
+        return RATE_SMOOTHING * measured + (1 - RATE_SMOOTHING) * rate
@@ -11,6 +11,9 @@ Programmer: David G Messerschmitt
 # !!! IF .PROTO FILE IS CHANGED, THIS FILE MUST BE EDITED TO ALIGN NAMES !!!
 
 import json
+import queue
+import time
+import grpc
 import numpy as np
 import inspect
 from pprint import pprint
@@ -19,8 +22,26 @@ import matplotlib.pyplot as plt
 import parameters as param
 import generic_client as gc
 import buffer as buff
+import frames
+import sessions
+import admission
 import time_series_receptors as cr
 
+# failures after which a stream is resumed rather than abandoned
+RESUMABLE = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.ABORTED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.RESOURCE_EXHAUSTED
+    )
+# seconds before the first attempt to resume, doubled for each further
+#   attempt, unless the server says when to retry
+RESUME_DELAY = 0.5
+# largest number of values of an accumulated time-series allocated
+#   before they arrive, so that a long (or endless) run is not
+#   allocated whole; beyond it, the array grows as values arrive
+MAXIMUM_PREALLOCATION = 2**24
+
 class TimeSeriesClient(gc.GenericClientStub):
         '''
         Retreives a generic time-series from a client stub
@@ -51,10 +72,74 @@ class TimeSeriesClient(gc.GenericClientStub):
 
                 # instantiate a buffer and point it to self
                 # used for conversion of repeated fields to time-series frames
-                self.buff = buff.TimeSeriesBuffer(self)
+                # values are held in a numpy ring buffer rather than lists
+                self.buff = buff.ArrayTimeSeriesBuffer(self)
 
                 self.abort = False # a fatal error has occured?
 
+                # id of our session with the server, which the server
+                #   returns in a metadata header when a session is opened
+                self.session_id = None
+
+                # seconds the server is allowed for a whole stream, after
+                #   which the stream is cancelled; None = no deadline
+                self.deadline = None
+
+                # attempts made to resume a stream which fails part way,
+                #   from the first time-sample not yet received
+                self.resumes = 3
+                # generator and transport parameters sent with 'set',
+                #   to configure a new session if ours is lost
+                self.settings = None
+
+                # frames granted to the server ahead of those consumed,
+                #   for aligned framing; the server then generates frames
+                #   only as fast as the receptor consumes them
+                #   0 = the server streams as fast as gRPC allows
+                self.window = 0
+                # largest number of frames in one message of such a stream
+                self.batch = 1
+                # queue of Credit messages sent to the server
+                self.credits = None
+
+                # send metadata as typed Struct values rather than JSON strings
+                self.structured = True
+
+                # transport-layer preferences sent to the server with 'set'
+                #   'packing' = 'packed' asks for samples as raw bytes in
+                #   Frame messages rather than repeated fields
+                #   'framing' = 'aligned' asks for whole multiplexed frames
+                #   in each message, so no re-chunking buffer is needed
+                #   'complex_dtype' = precision of packed complex values,
+                #   'complex64' or 'complex128'
+                #   'native_dtype' = True asks for values in the dtype the
+                #   generator stores them (like SigMF ci8), unconverted
+                #   'quantize' = 'int8' or 'int16' accepts lossy quantization
+                #   of floating-point values, for quick-look browsing
+                #   'codec' = lossless numeric codec applied to each frame,
+                #   like 'delta-shuffle-zlib', for constrained links
+                #   'channel_compression' = 'gzip' or 'deflate' applied by
+                #   gRPC to every message
+                #   'implicit_axes' = True synthesizes axes like sampling
+                #   times locally, rather than receiving them
+                #   'prefetch' = number of frames the server generates
+                #   ahead while sending earlier ones
+                #   'buffer_capacity' = bound on the values buffered by
+                #   the server for flat framing, filled ahead by a thread
+                # other choices, like the 'message_bytes' budget, are
+                #   left to the server defaults unless added here
+                self.transport = {
+                    'packing':'packed',
+                    'framing':'aligned',
+                    'complex_dtype':'complex64',
+                    'native_dtype':True,
+                    'quantize':'none',
+                    'codec':'none',
+                    'channel_compression':'none',
+                    'implicit_axes':True,
+                    'prefetch':2
+                    }
+
                 super().__init__()
 
         def handle_to_rec(self,handle):
@@ -75,13 +160,50 @@ class TimeSeriesClient(gc.GenericClientStub):
 		#   response = parameter dictonary
 		#   alert = alert string with any information not requesed
 
-		# JSON string representation of param is actually sent
-                t = {'operation':op,'parameters':json.dumps(p)}
-                s = self.message.Config(**t)
-                r = self.channel.MetaDataCoordination(s) # returns response message
+                s = self.config(op,p)
+                # returns response message
+                [r,call] = self.channel.MetaDataCoordination.with_call(
+                    s,metadata=self.metadata())
+                self.remember(call)
+                return [self.response(r), r.alert]
+
+        def metadata(self):
+                # returns the gRPC metadata identifying our session,
+                #   empty until the server has opened one
+
+                if self.session_id is None:
+                    return ()
+                return ((sessions.SESSION_HEADER,self.session_id),)
+
+        def remember(self,call):
+                # store the session id if the server has sent one
+                #   in the header of the response to call
+
+                for key, value in call.initial_metadata():
+                    if key == sessions.SESSION_HEADER:
+                        self.session_id = value
+
+        def config(self,op,p):
+                # returns Config message with operation op and parameters p
+                # parameters are sent typed (as a Struct) if self.structured,
+                #   or otherwise as a JSON string
+
+                s = self.message.Config(operation=op)
+                if self.structured:
+                    s.values.SetInParent() # present even if p is empty
+                    s.values.update(p)
+                else:
+                    s.parameters = json.dumps(p)
+                return s
+
+        def response(self,r):
+                # returns dictonary from Info message r, which is typed
+                #   (as a Struct) if the request was typed
 
+                if r.HasField('values'):
+                    return param.from_struct(r.values)
 		# JSON response message converted to dictonary 
-                return [json.loads(r.response), r.alert]
+                return json.loads(r.response)
 
         def discover_and_choose(self):
                 # get information about services available, and choose one
@@ -92,7 +214,8 @@ class TimeSeriesClient(gc.GenericClientStub):
                 [r,a] = self.metadata_message_and_response('service_types?', {})
 
                 print('\nList of time-series generators available:')
-                names = list(r['service_type'].keys())
+                # sorted, since a typed response does not preserve the order
+                names = sorted(r['service_type'].keys())
                 for i in range(len(names)):
                     print('\nService #{}:'.format(i+1),'\nHandle: ',names[i])
                     print('Description:\n',r['service_type'][names[i]])
@@ -136,12 +259,26 @@ class TimeSeriesClient(gc.GenericClientStub):
                 # store parameter values as attributes for efficiency
                 self.param_dict_to_var(self.rec,p)
 
-                # inform server of parameters chosen
+                # inform server of parameters chosen, along with
+                #   transport-layer preferences
                 # server returns generator configuration information
-                [p,a] = self.metadata_message_and_response('set', self.param.final())
+                t = self.param.final().copy()
+                t.update(self.transport)
+                self.settings = t
+                [p,a] = self.metadata_message_and_response('set', t)
                 if a != '':
                         print('\nAlert from server: ', a)
 
+                self.configure_transport(p)
+
+        def configure_transport(self,p):
+                # configure the client from the generator configuration
+                #   information p returned by the server
+
+                if 'data_type' not in p: # server has rejected the parameters
+                    self.abort = True
+                    return
+
                 # in p = the configuration information returned, we are expecting
                 #   'data_type' = 'real' or 'complex'
                 #   'array_shapes' = list of numpy ndarray shapes for the time-series
@@ -151,6 +288,28 @@ class TimeSeriesClient(gc.GenericClientStub):
                 self.rpc = p['data_type']
                 print('\nData type to be used: ',self.rpc)
 
+                # 'transport' = transport configuration agreed by server
+                #   (absent for servers without packed frames)
+                transport = p.get('transport',{})
+                self.packing = transport.get('packing','repeated')
+                self.framing = transport.get('framing','flat')
+                print('Packing to be used: ',self.packing,self.framing)
+
+                # values streamed in the generator's own dtype may need a
+                #   scale factor to convert them to physical units
+                self.scale = 1.
+                if transport.get('native_dtype') and 'sample_dtype' in p:
+                    self.scale = p.get('sample_scale',1.)
+                    print('Native dtype to be used: ',p['sample_dtype'],
+                          'with scale ',self.scale)
+
+                # largest number of samples in any message of a flat
+                #   stream, for preallocation; a message of aligned or
+                #   credited frames holds at least one whole frame,
+                #   which may be larger
+                self.message_samples = transport.get('message_samples')
+                print('Largest number of samples per message: ',self.message_samples)
+
                 # 'array_shapes' specifies the shapes of the numby arrays
                 #   so that they can be recovered from the serialized versions
                 self.shapes = p['array_shapes'] # list of shapes
@@ -159,11 +318,80 @@ class TimeSeriesClient(gc.GenericClientStub):
                 self.sizes = [None] * self.num
                 for i in range(self.num):
                     self.sizes[i] = np.prod(self.shapes[i])
-                self.total = sum(self.sizes)
+
+                # series declared as affine axes are synthesized locally,
+                #   if the server has agreed not to stream them
+                self.axes = {}
+                if transport.get('implicit_axes'):
+                    for a in p.get('implicit_axes',[]):
+                        self.axes[a['series']] = ImplicitAxis(a['start'],a['step'])
+                if self.axes:
+                    print('Time-series synthesized locally: ',list(self.axes.keys()))
+
+                # number of time-samples pushed to the receptor, counted
+                #   along the time dimension [0] of the time-series
+                self.received = 0
+
+                # total number of values streamed per frame
+                self.total = 0
+                for i in range(self.num):
+                    if i not in self.axes:
+                        self.total += self.sizes[i]
+
+                # frames of flat streams are cut into arrays preallocated
+                #   once, if the receptor lets them be reused
+                self.assembler = FrameAssembler(
+                    self.shapes,self.axes,reuse_frames(self.rec))
                 
                 # configure the receptor
                 self.rec.shapes(self.shapes)
 
+        def open_session(self,handle,p=None):
+                # discovery, configuration and streaming in a single call,
+                #   for batch use without interaction
+                # handle = handle of the chosen time-series generator
+                # p = parameter values overriding those of the receptor,
+                #   or None
+                # the server replies with its configuration information,
+                #   followed by the time-series as whole multiplexed frames
+
+                self.abort = False
+                self.choice = handle
+                self.rec = self.handle_to_rec(handle)
+                if self.rec is None:
+                    self.abort = True
+                    print('\nNo time-series receptor for {}'.format(handle))
+                    return
+
+                t = self.rec.parameters()
+                t.update(p or {})
+                t.update(self.transport)
+                self.settings = t.copy()
+                t['service_choice'] = handle
+                session = self.channel.OpenSession(
+                    self.config('open',t),timeout=self.deadline)
+
+                # the first message is the configuration information
+                first = next(session)
+                self.remember(session)
+                if first.info.alert != '':
+                    print('\nAlert from server: ', first.info.alert)
+                p = self.response(first.info)
+                self.configure_transport(p)
+                if self.abort: return
+
+                # store final parameter values as attributes of the receptor
+                self.param_dict_to_var(self.rec,p['parameters'])
+
+                # the remaining messages carry the time-series
+                self.r = (m.frames for m in session)
+
+        def run_session(self,handle,p=None):
+                # retrieve a time-series with a single round trip
+
+                self.open_session(handle,p)
+                if not self.abort: self.retrieve()
+
 	#   ********** runtime operations *************   #
 
         def stream(self):
@@ -178,10 +406,21 @@ class TimeSeriesClient(gc.GenericClientStub):
                 # invoke the appropriate RCP channel for 'data_type"
                 #   chosen by the time-series generator
                 # capture resulting time series
-                if self.rpc == 'real':
-                    self.r = self.channel.RealTimeSeries(s)
+                # the server streams the time-series of our session
+                # within the deadline, if any
+                m = self.metadata()
+                d = self.deadline
+                if self.framing == 'aligned' and self.window > 0:
+                    self.r = self.channel.CreditedTimeSeries(
+                        self.credit_requests(),metadata=m,timeout=d)
+                elif self.framing == 'aligned':
+                    self.r = self.channel.AlignedTimeSeries(s,metadata=m,timeout=d)
+                elif self.packing == 'packed':
+                    self.r = self.channel.FrameTimeSeries(s,metadata=m,timeout=d)
+                elif self.rpc == 'real':
+                    self.r = self.channel.RealTimeSeries(s,metadata=m,timeout=d)
                 elif self.rpc == 'complex':
-                    self.r = self.channel.ComplexTimeSeries(s)
+                    self.r = self.channel.ComplexTimeSeries(s,metadata=m,timeout=d)
                 else:
                     self.abort = True
                     print(
@@ -192,6 +431,57 @@ class TimeSeriesClient(gc.GenericClientStub):
 		#   can only be iterated once by repeated calls to
 		#   the get() method
 
+        def credit_requests(self):
+                # returns an iterator over the Credit messages of a new
+                #   stream, starting with the credit of a full window
+
+                self.credits = queue.Queue()
+                self.owed = 0 # frames consumed but not yet granted again
+                self.credit(frames=self.window,batch=self.batch)
+                def requests(credits):
+                    while True:
+                        c = credits.get()
+                        if c is None: return # end of the stream
+                        yield c
+                return requests(self.credits)
+
+        def credit(self,frames=0,batch=0,frame_samples=0,pause=False):
+                # send Credit to the server during a paced stream
+                # frames = number of further frames granted
+                # batch = largest number of frames per message from now on
+                # frame_samples = number of time-samples per frame from now on
+                # pause = True pauses the stream until credit is sent again
+                # values of 0 leave the current choices unchanged
+
+                if self.credits is not None:
+                    self.credits.put(self.message.Credit(frames=frames,
+                        batch=batch,frame_samples=frame_samples,pause=pause))
+
+        def consumed(self):
+                # one frame has been consumed by the receptor, so a frame
+                #   is granted again, in batches of half the window
+
+                if self.credits is None: return
+                self.owed += 1
+                if self.owed >= max(self.window // 2,1):
+                    self.credit(frames=self.owed)
+                    self.owed = 0
+
+        def end_credit(self):
+                # no further credit will be sent for this stream
+                if self.credits is not None:
+                    self.credits.put(None)
+                    self.credits = None
+
+        def unpack(self,frame):
+                # a packed frame is viewed as a numpy array without copying
+                # values in the generator's own dtype may need scaling
+
+                vals = frames.unpack(frame)
+                if self.scale != 1.:
+                    vals = vals * self.scale
+                return vals
+
         def get(self):
 		# get next repeated field from r and return that list
 		# this method will be called repeatedly by a buffer
@@ -200,6 +490,9 @@ class TimeSeriesClient(gc.GenericClientStub):
                 rnext = next(self.r, None) # None = default if no more data
                 if rnext == None: return [] # signals end of streaming
 
+                if self.packing == 'packed':
+                    return self.unpack(rnext)
+
 		# each rnext.sample is a repeated field, represented as list
                 if self.rpc == 'real':
                     return rnext.sample
@@ -220,6 +513,86 @@ class TimeSeriesClient(gc.GenericClientStub):
             # returns a list of numpy arrays,
             #   one for each time-multiplexed series
 
+                # a stream which fails part way is resumed where it
+                #   left off, up to self.resumes times
+                # a stream ended early otherwise, for example by its
+                #   deadline, leaves the receptor with the frames received
+                attempts = 0
+                while True:
+                    try:
+                        if self.framing == 'aligned':
+                            self.retrieve_aligned()
+                        else:
+                            self.retrieve_flat()
+                        return
+                    except grpc.RpcError as e:
+                        print('\nStream ended early: ',e.code(),e.details())
+                        error = e
+                    finally:
+                        self.end_credit()
+
+                    resumed = False
+                    while not resumed and error.code() in RESUMABLE \
+                          and attempts < self.resumes:
+                        attempts += 1
+                        time.sleep(self.retry_delay(error,attempts))
+                        try:
+                            resumed = self.resume()
+                        except grpc.RpcError as e:
+                            print('\nResumption failed: ',e.code(),e.details())
+                            error = e
+                        else:
+                            if not resumed: break # refused by the server
+                    if not resumed:
+                        self.abort = True
+                        self.rec.receive([])
+                        return
+
+        def retry_delay(self,error,attempts):
+                # seconds to wait before attempt number attempts to resume
+                #   a stream which ended with error, as advised by the
+                #   server if it is overloaded
+
+                for key, value in error.trailing_metadata() or ():
+                    if key == admission.RETRY_HEADER:
+                        return float(value)
+                return RESUME_DELAY * 2**(attempts-1)
+
+        def resume(self):
+                # continue a stream which ended early from the first
+                #   time-sample not yet received, rather than starting over
+                # the server repositions its generator at that time-sample
+                # only whole frames count as received, since a frame is
+                #   multiplexed series by series, so a generator sending
+                #   its run as one frame (like SigMFfileBrowser) resumes
+                #   from its first time-sample
+                # returns True if the stream has been resumed
+
+                print('\nResuming stream at time-sample ',self.received)
+                p = {'sample' : self.received}
+                [r,a] = self.metadata_message_and_response('resume', p)
+                if a != '' and self.settings is not None:
+                    # our session has been lost, for example with a worker
+                    #   process of the server, so configure a new one
+                    print('\nAlert from server: ', a)
+                    self.session_id = None
+                    c = {'service_choice' : self.choice}
+                    [r,a] = self.metadata_message_and_response('service_choice', c)
+                    if a == '':
+                        [r,a] = self.metadata_message_and_response('set', self.settings)
+                        if 'data_type' in r:
+                            [r,a] = self.metadata_message_and_response('resume', p)
+                if a != '':
+                    print('\nAlert from server: ', a)
+                    return False
+
+                self.buff.initialize()
+                self.stream()
+                return not self.abort
+
+        def retrieve_flat(self):
+            # as retrieve(), for streams cut from a flat stream of values
+
                 while True:
 
                         # time-series of different shapes are time-division multiplexed
@@ -227,30 +600,121 @@ class TimeSeriesClient(gc.GenericClientStub):
 
                         # fetch one complete frame from buffer
                         vl = self.buff.get(self.total)
-                        # temporary storage for manipulation
-                        size = len(vl)
-                        shapes = self.shapes
-                        sizes = self.sizes
 
-                        if size == 0:
+                        if len(vl) == 0:
                             self.rec.receive([])
                             break
-                        elif size < self.total:
-                            # the time dimension [0] is smaller in proportion
-                            for i in range(self.num):
-                                shapes[i][0] = int( self.shapes[i][0] * size / self.total )
-                                sizes[i] = np.prod(shapes[i])
-
-                        vals = [None] * self.num
-                        start = 0
-                        for i in range(self.num):
-                            vl0 = vl[start:start+sizes[i]]
-                            vals[i] = np.array(vl0).reshape(shapes[i],order='C')
-                            start += sizes[i]
+
+                        # one array for each time-series
+                        vals = self.assembler.assemble(vl)
                                                 
                         # push list of array's to the time-series receptor
                         self.rec.receive(vals)
+                        self.received += vals[0].shape[0]
            
+        def retrieve_aligned(self):
+            # as retrieve(), but for streams of whole multiplexed frames
+            # each Frame is tagged with its series index and frame number,
+            #   so frames are pushed to the receptor as they arrive
+            #   and any gap in the frame numbers is reported
+
+                expected = 0 # next frame number
+                for message in self.r:
+
+                        # group the series of each whole frame in this message
+                        numbers = []
+                        grouped = {}
+                        for f in message.series:
+                            if f.frame_number not in grouped:
+                                numbers.append(f.frame_number)
+                                grouped[f.frame_number] = [None] * self.num
+                            grouped[f.frame_number][f.series_index] = self.unpack(f)
+
+                        for n in numbers:
+                            if n != expected:
+                                print('\nFrames {0} to {1} missing from stream'.format(expected,n-1))
+                            expected = n + 1
+
+                            vals = grouped[n]
+                            # synthesize implicit axes with the same
+                            #   time dimension as the streamed series
+                            streamed = [v for v in vals if v is not None]
+                            for i in self.axes.keys():
+                                shape = list(self.shapes[i])
+                                shape[0] = streamed[0].shape[0]
+                                vals[i] = self.axes[i].next(shape)
+                            if any(v is None for v in vals):
+                                print('\nFrame {} is missing a time-series'.format(n))
+                                self.consumed()
+                                continue
+                            self.rec.receive(vals)
+                            self.received += vals[0].shape[0]
+                            self.consumed()
+
+                        if message.final: break
+
+                self.rec.receive([])
+
+        def report(self):
+                # ask the server to report on the completed stream, like
+                #   the accuracy of quantized values, and print the report
+
+                [r,a] = self.metadata_message_and_response('stream_report?', {})
+                if r:
+                    print('\nReport on stream from server:\n')
+                    pprint(r)
+
+        def get_range(self,file,start,count,stride=1):
+                # read a range of samples of a recorded signal file on the
+                #   server, without any session or configuration
+                # file = name of the SigMF data file on the server
+                # start, count, stride = index of the first sample, number
+                #   of samples and step between successive samples
+                # returns numpy array with the [real, imag] components of
+                #   each sample (or its value, for a real recording), in
+                #   the dtype stored in the file
+
+                r = self.message.RangeRequest(
+                    file=file,start=start,count=count,stride=stride)
+                return frames.unpack(self.channel.GetRange(r,timeout=self.deadline))
+
+        def stream_range(self,file,start,count,stride=1,frame=0):
+                # as get_range(), but for a longer range, returning an
+                #   iterator over numpy arrays of frame samples each
+                #   (frame = 0 leaves the number to the server)
+
+                r = self.message.RangeRequest(file=file,start=start,
+                    count=count,stride=stride,frame=frame)
+                return (frames.unpack(f) for f in
+                        self.channel.StreamRange(r,timeout=self.deadline))
+
+        def health(self):
+                # ask the server about its health, like the number of
+                #   sessions and streams of each of its worker processes
+
+                [r,a] = self.metadata_message_and_response('health?', {})
+                print('\nHealth of server:\n')
+                pprint(r)
+                return r
+
+        def stats(self):
+                # ask the server for the counters of the buffer of our
+                #   session, like its peak occupancy and bytes copied,
+                #   and print them with those of our own buffer
+
+                [r,a] = self.metadata_message_and_response('stats?', {})
+                r['client_buffer'] = self.buff.stats()
+                print('\nBuffer statistics:\n')
+                pprint(r)
+                return r
+
+        def close(self):
+                # end our session, releasing its state on the server
+
+                if self.session_id is not None:
+                    self.metadata_message_and_response('close', {})
+                    self.session_id = None
+
         def run(self):
                 # orchestrate stages of operation
                 
@@ -258,6 +722,8 @@ class TimeSeriesClient(gc.GenericClientStub):
                 if not self.abort: self.configuration()
                 if not self.abort: self.stream()
                 if not self.abort: self.retrieve()
+                if not self.abort: self.report()
+                self.close()
                         
         def param_dict_to_var(self,obj,p):
                 # stores final set of parameters as attributes for efficiency
@@ -275,6 +741,151 @@ base class that captures common functionality.
 Time-series receptor classes can inherit this class at their option.
 '''
 
+class ImplicitAxis():
+    '''
+    Synthesizes a time-series which is an affine axis, like sampling
+    times, so that it need not be streamed by the server
+    Values are computed in double precision from the sample index,
+    so they do not drift over long runs
+    '''
+
+    def __init__(self,start,step):
+        # value of sample n is start + step * n
+        self.start = start
+        self.step = step
+        self.count = 0 # number of samples synthesized so far
+
+    def next(self,shape):
+        # returns the next frame of the axis as numpy array with shape
+
+        n = int(np.prod(shape))
+        index = np.arange(self.count,self.count+n,dtype=np.float64)
+        vals = self.start + self.step * index
+        self.count += n
+        return vals.reshape(shape)
+
+
+def reuse_frames(rec):
+    # may the arrays of one frame be filled again for the next frame
+    #   pushed to receptor rec? chosen by the class attribute
+    #   __reuse_frames__ = True
+    return getattr(type(rec),'__reuse_frames__',False)
+
+class FrameAssembler():
+    '''
+    Cuts each frame of a flat stream of values into one numpy array
+    for each time-division multiplexed time-series, with the shapes
+    agreed with the server, which are never altered
+    If the receptor reuses frames, the arrays are allocated once and
+    filled again for each frame, so the receptor must be done with
+    one frame before it receives the next; otherwise each frame is
+    copied into new arrays
+    A short last frame is given in proportion fewer time-samples
+    '''
+
+    def __init__(self,shapes,axes,reuse=False):
+        # shapes = list of array shapes, one for each time-series
+        # axes = dictionary of ImplicitAxis synthesizing time-series locally
+        # reuse = fill the same arrays for each frame?
+
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.axes = axes
+        self.reuse = reuse
+        self.total = 0 # number of values streamed per frame
+        for i in range(len(self.shapes)):
+            if i not in self.axes:
+                self.total += int(np.prod(self.shapes[i]))
+        self.arrays = None # preallocated arrays, once the dtype is known
+
+    def allocate(self,dtype):
+        # preallocate one array for each streamed time-series
+        self.arrays = [
+            None if i in self.axes else np.empty(self.shapes[i],dtype=dtype)
+            for i in range(len(self.shapes))
+            ]
+
+    def assemble(self,vl):
+        # vl = 1-D numpy array of the values of one frame (or of the
+        #   last frame, which may be short)
+        # returns list of numpy arrays, one for each time-series
+
+        if self.reuse and (self.arrays is None or
+                           self.arrays[self.streamed()].dtype != vl.dtype):
+            self.allocate(vl.dtype)
+
+        vals = [None] * len(self.shapes)
+        start = 0
+        for i in range(len(self.shapes)):
+            shape = self.shapes[i]
+            if len(vl) < self.total:
+                # the time dimension [0] is smaller in proportion
+                shape = (shape[0] * len(vl) // self.total,) + shape[1:]
+            if i in self.axes:
+                vals[i] = self.axes[i].next(shape)
+                continue
+            stop = start + int(np.prod(shape))
+            frame = vl[start:stop].reshape(shape)
+            if self.reuse:
+                # a view of the leading time-samples, for a short frame
+                vals[i] = self.arrays[i][:shape[0]]
+                vals[i][...] = frame
+            else:
+                vals[i] = frame.copy()
+            start = stop
+        return vals
+
+    def streamed(self):
+        # index of the first time-series which is streamed
+        for i in range(len(self.shapes)):
+            if i not in self.axes:
+                return i
+
+class Accumulator():
+    '''
+    A 1-D numpy array to which values are appended, copying them once
+    into spare capacity, which doubles whenever it runs out, so that
+    accumulating n values takes time proportional to n
+    The capacity is exact if the number of values is known in advance,
+    though no more than MAXIMUM_PREALLOCATION values are allocated
+    before they arrive
+    '''
+
+    def __init__(self,capacity=0):
+        # capacity = number of values expected, or 0 if unknown
+
+        self.capacity = capacity
+        self.array = None # allocated with the dtype of the first values
+        self.count = 0 # number of values accumulated
+
+    def append(self,vals):
+        # vals = numpy array of values, which are appended in C order
+
+        vals = np.ravel(vals)
+        n = vals.size
+        if self.array is None:
+            size = min(self.capacity,MAXIMUM_PREALLOCATION)
+            self.array = np.empty(max(size,n),dtype=vals.dtype)
+        elif self.count + n > self.array.size or \
+                not np.can_cast(vals.dtype,self.array.dtype,'same_kind'):
+            # grow, promoting the dtype (like float to complex) if need be,
+            #   but no further than the number of values expected
+            size = max(self.count + n,2 * self.array.size)
+            if self.capacity >= self.count + n:
+                size = min(size,self.capacity)
+            array = np.empty(size,
+                dtype=np.result_type(self.array.dtype,vals.dtype))
+            array[:self.count] = self.array[:self.count]
+            self.array = array
+        self.array[self.count:self.count+n] = vals
+        self.count += n
+
+    def values(self):
+        # returns numpy array of the values accumulated so far
+        if self.array is None:
+            return np.array([])
+        return self.array[:self.count]
+
+
 class MultiplexedTimeSeries():
     '''
     Time-series receptor for any generator that time-division multiplexes
@@ -296,8 +907,22 @@ class MultiplexedTimeSeries():
 
         self.shapes = s
 
-        # allocate list of numby arrays to capture whole signals
-        self.whole = [np.array([])] * len(self.shapes)
+        # whole signals are captured by accumulate(), once the
+        #   parameter values of the run are known
+        self.accumulators = None
+
+    @property
+    def whole(self):
+        # list of numpy arrays capturing the whole signals
+        if self.accumulators is None:
+            return [np.array([])] * len(self.shapes)
+        return [a.values() for a in self.accumulators]
+
+    def time_samples(self):
+        # returns the number of time-samples in the whole time-series,
+        #   if known from the parameter values of the run, or None
+        # inherited class may override this for its own parameters
+        return getattr(self,'num_samples',None)
         
     def accumulate(self,vals):
         # service provided at the option of the inherited class
@@ -306,12 +931,17 @@ class MultiplexedTimeSeries():
         # inherited class may need to deal with frames directly
         #   (as in a feedback situation)
         #   in which case it doesn't call this method
-        
+        # values are copied, so the frame itself is not kept
+
+        if self.accumulators is None:
+            # preallocate exactly if the length is known
+            n = self.time_samples() or 0
+            self.accumulators = [
+                Accumulator(int(n * np.prod(shape[1:])))
+                for shape in self.shapes
+                ]
         for i in range(len(self.shapes)):
-            if self.whole[i].size == 0:
-                self.whole[i] = vals[i]
-            else:
-                self.whole[i] = np.append(self.whole[i],vals[i])
+            self.accumulators[i].append(vals[i])
 
     def print(self,title,res,vals):
         # print out a time-series
@@ -9,6 +9,7 @@ Progammer David G Messerschmitt
 """
 
 import os
+import json
 import numpy as np
 from scipy import signal
 from pprint import pprint
@@ -42,6 +43,50 @@ imag-parts of a complex value. The number of dimensions and the meaning of those
 dimensions is a matter of convention established between coordinated generator
 and client implementations and documented by the parameter dictionary (below).
 
+With packed transport, complex values are streamed as interleaved
+(real,imag) pairs in one contiguous block, at the precision negotiated with
+the client ('complex64' or 'complex128'). A generator should simply return
+the complex ndarray it has computed (for example the output of np.exp);
+at 'complex128' precision this array is sent without any conversion or copy.
+
+A time-series which is simply an affine axis, like sampling times, can be
+declared by adding 'implicit_axes' to the transport parameters returned by
+initialize(). This is a list of dictionaries, each with the index 'series' of
+the one-dimensional time-series and its 'start' and 'step', so that sample n
+has value start + step * n. A client which negotiates 'implicit_axes' then
+synthesizes that time-series at full precision rather than receiving it.
+The generator still returns the time-series from generate() as usual.
+
+A generator whose values are stored in a compact form (like the 8- or 16-bit
+integers of a SigMF recording) can add 'sample_dtype' to the transport
+parameters returned by initialize(), giving the numpy dtype string of its
+values (for example '|i1' or '<i2'), and optionally 'sample_scale', a factor
+which converts those values to physical units. A client which negotiates
+'native_dtype' is then streamed the values unconverted, and applies the scale.
+
+A generator which is computation-bound (like a periodogram computed by scipy)
+can declare the class attribute __execution__ = 'process', so that its
+initialize() and generate() are run in a worker process of a pool rather than
+in the server, using other cores. Its frames are handed back to the server
+through shared memory. Such a generator is instantiated afresh in the worker,
+with its parameter values as attributes, so it must not depend on any other
+state of the server. The default is __execution__ = 'thread'.
+
+A generator may have a seek(sample_index) method, called after initialize(),
+which positions it so that its next frame starts at that time-sample (counted
+along the first dimension of its time-series, from the start of the run).
+A client whose stream ended early can then resume it where it left off,
+rather than starting over. A generator without seek() is instead advanced
+by generating and discarding whole frames. A stream resumes after the last
+whole frame received, as the series of a frame are sent one after another,
+so a generator producing its whole run as a single frame starts over.
+
+A generator may also have a cancel() method, which is called (from another
+thread) when the client cancels the stream, its deadline passes or its
+connection is lost. A generator whose generate() calls take a long time
+should then return an empty list as soon as it can. Between calls to
+generate() no such method is needed, as the server stops calling generate().
+
 Generally 'real_valued_streaming' is preferred because it is more general.
 For example, it would be inefficient to represent time-values by dtype = complex values.
 It is straightforward to represent complex values by a dimension containing the
@@ -77,6 +122,34 @@ Fortunately this serialization and multiplexing is very straightforward with
 available NumPy functions, as illustrated by the examples below.
 '''
 
+# numpy dtype of one real or imag component for each SigMF datatype,
+#   which is named like 'ci16_le' = complex 16-bit little-endian integers
+SIGMF_COMPONENT_TYPES = {
+    'i8':'i1', 'u8':'u1', 'i16':'i2', 'u16':'u2',
+    'i32':'i4', 'u32':'u4', 'f32':'f4', 'f64':'f8'
+    }
+
+def sigmf_datatype(data_path):
+    # data_path = path to a SigMF signal data file
+    # returns [datatype, dtype, is_complex] where
+    #   datatype = SigMF datatype recorded in the accompanying .sigmf-meta file
+    #     (recordings without a meta file are assumed to be 'ci8')
+    #   dtype = numpy dtype of one real or imag component of a sample
+    #   is_complex = True if each sample is a [real, imag] pair of
+    #     components ('c' datatypes), False for real samples ('r')
+
+    datatype = 'ci8'
+    meta_path = os.path.splitext(data_path)[0] + '.sigmf-meta'
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            datatype = json.load(f)['global']['core:datatype']
+
+    # strip the leading 'c' (complex) or 'r' (real) and any byte order
+    component = datatype[1:].split('_')[0]
+    order = '>' if datatype.endswith('_be') else '<'
+    return [datatype, np.dtype(order + SIGMF_COMPONENT_TYPES[component]),
+            datatype.startswith('c')]
+
 class CExpPlusTimeR():
     '''
     Time-series generator for a complex-exponential that streams real-values.
@@ -149,7 +222,13 @@ time-series frame',
             
             # we will time-division multiplex three time-series:
             # [times, reals, imags]
-            'array_shapes': [[self.frame]] * 3
+            'array_shapes': [[self.frame]] * 3,
+
+            # the times are start + step * (sample index), so the
+            #   client can synthesize them instead of receiving them
+            'implicit_axes': [
+                {'series':0, 'start':0., 'step':self.sampling_interval}
+                ]
             }
         
         return r
@@ -182,6 +261,10 @@ time-series frame',
             return [ t, vals.real, vals.imag ]
 
         else: return []
+
+    def seek(self,sample_index):
+        # the next frame starts at time-value sample_index
+        self._count = min(sample_index,self._num_samples)
         
 
 class CExpC():
@@ -283,12 +366,17 @@ of 2*pi;  by sampling theorem, it must be in the range +-0.5',
 ##        else: return np.array([])
         else: return []
 
+    def seek(self,sample_index):
+        # the next frame starts at time-value sample_index
+        self._count = min(sample_index,self.num_samples)
+
 
 class SigMFfileBrowser():
     '''
     This signal generator reads a range of complex values of a SigMF
     file containing a recorded signal. It streams the real and imaginary
-    time series as two separate signals to the client.
+    time series as two separate signals to the client, or the samples
+    of a real recording as a single signal.
     '''
 
     __handle__ = 'browse samples stored in a SigMF file'
@@ -342,14 +430,18 @@ class SigMFfileBrowser():
         # file relative path to data file
         self.file_path = os.path.join(self.directory,self.file_name)
         
-        # Map the file for easy access to the data  
-        self.file_map = np.memmap(self.file_path,dtype=np.byte)
+        # Map the file for easy access to the data, with values of
+        #   the datatype recorded in its meta file
+        [self.datatype, dtype, self.is_complex] = sigmf_datatype(self.file_path)
+        self.file_map = np.memmap(self.file_path,dtype=dtype,mode='r')
 
         # Useful for checking file indexes against file length
         self.total_file_length = self.file_map.size
 
         # Track number of calls
         self.call_count = 0
+        # first sample of the range to be read, relative to starting_sample
+        self.offset = 0
 
         # transport parameters returned to client for its configuration
         r = {
@@ -357,8 +449,15 @@ class SigMFfileBrowser():
             'data_type' : 'real',  # must be 'real' or 'complex'
             
             # we will time-division multiplex two time-series:
-            # [reals, imags]
-            'array_shapes': [[self.total_sample_count]] * 2
+            # [reals, imags], or only the samples of a real recording
+            'array_shapes': [[self.total_sample_count]] * (
+                2 if self.is_complex else 1),
+
+            # values can be streamed as stored in the file
+            #   (for example ci8 is one byte per value)
+            'source_datatype' : self.datatype,
+            'sample_dtype' : self.file_map.dtype.str,
+            'sample_scale' : 1.
             }
         
         return r
@@ -369,14 +468,25 @@ class SigMFfileBrowser():
         # these values have dtype=real because we specified
         #   'data_type' to be float
 
-        if self.call_count < 1:
+        # the range remaining after any seek()
+        count = self.total_sample_count - self.offset
+
+        if self.call_count < 1 and count > 0 and not self.is_complex:
+
+            # a real recording is streamed as it is, as one time-series
+            start = self.starting_sample + self.offset
+            self.call_count += 1
+            return [ self.file_map[start:start+count] ]
+
+        elif self.call_count < 1 and count > 0:
             
+            start = self.starting_sample + 2*self.offset
             # Odd values (starting with index one) are the real part
             self.datavals_real = \
-                self.file_map[self.starting_sample:self.starting_sample+2*self.total_sample_count:2]
+                self.file_map[start:start+2*count:2]
             # Repeat starting with index two to get the complex part
             self.datavals_imag = \
-                self.file_map[self.starting_sample+1:self.starting_sample+2*self.total_sample_count][::2]
+                self.file_map[start+1:start+2*count][::2]
             
             self.call_count += 1
 
@@ -385,6 +495,11 @@ class SigMFfileBrowser():
 
         else: return []
 
+    def seek(self,sample_index):
+        # the next frame starts at sample sample_index of the range,
+        #   found by indexing the memory-mapped file
+        self.offset = min(sample_index,self.total_sample_count)
+
 class SigMFfilePeriodogram():
     '''
     This signal generator reads a range of complex values of a SigMF
@@ -394,6 +509,10 @@ class SigMFfilePeriodogram():
 
     __handle__ = 'generate a Welch periodogram on a SigMF file'
 
+    # the periodogram is computation-bound, so it is computed
+    #   in a worker process rather than in the server
+    __execution__ = 'process'
+
     def parameters(self):
         # specify configuration parameters, including values (cannot be changed)
         #   and defaults (subject to change)
@@ -444,8 +563,10 @@ class SigMFfilePeriodogram():
         # file relative path to data file
         self.file_path = os.path.join(self.directory,self.file_name)
         
-        # Map the file for easy access to the data  
-        self.file_map = np.memmap(self.file_path,dtype=np.byte)
+        # Map the file for easy access to the data, with values of
+        #   the datatype recorded in its meta file
+        [self.datatype, dtype, self.is_complex] = sigmf_datatype(self.file_path)
+        self.file_map = np.memmap(self.file_path,dtype=dtype,mode='r')
         
         # Useful for checking file indexes against file length
         self.total_file_length = self.file_map.size
@@ -475,17 +596,23 @@ class SigMFfilePeriodogram():
         #   'data_type' to be float
 
         if self.call_count < 1:
-    
-            # Odd values (starting with index one) are the real part
-            self.datavals_real = \
-                self.file_map[self.starting_sample:self.starting_sample+2*self.total_sample_count:2]
-            # Repeat starting with index two to get the complex part
-            self.datavals_imag = \
-                self.file_map[self.starting_sample+1:self.starting_sample+2*self.total_sample_count][::2]
 
-            # Do the periodogram
+            if self.is_complex:
+                # Odd values (starting with index one) are the real part
+                self.datavals_real = \
+                    self.file_map[self.starting_sample:self.starting_sample+2*self.total_sample_count:2]
+                # Repeat starting with index two to get the complex part
+                self.datavals_imag = \
+                    self.file_map[self.starting_sample+1:self.starting_sample+2*self.total_sample_count][::2]
+                vals = self.datavals_real + 1j*self.datavals_imag
+            else:
+                # the samples of a real recording are used as they are
+                vals = self.file_map[self.starting_sample:self.starting_sample+self.total_sample_count]
+
+            # Do the periodogram, two-sided (like that of complex
+            #   values) so that it has the size declared
             self.f, self.PS = \
-               signal.welch(self.datavals_real + 1j*self.datavals_imag,scaling='spectrum')
+               signal.welch(vals,scaling='spectrum',return_onesided=False)
 
             print('Periodogram array sizes', self.f.size, self.PS.size)
             
@@ -495,3 +622,9 @@ class SigMFfilePeriodogram():
             return [ self.f, self.PS ]
 
         else: return []
+
+    def seek(self,sample_index):
+        # the periodogram is one frame, which cannot be divided,
+        #   so a run resumes either at its start or at its end
+        if sample_index > 0:
+            self.call_count = 1
@@ -37,11 +37,21 @@ Each receptor is assumed to have the following attributes:
     wrapup() = a method that is called after the entire time-series
         has been accumulated; typically it does something with the final
         time-series like printing or plotting
+
+and may have the following attribute:
+
+    __reuse_frames__ = True if the receptor is done with the arrays of
+        each frame before the next is received, so that the client can
+        fill the same arrays again rather than allocating new ones
+        (accumulate() copies the values, so a receptor that only
+        accumulates them may; one keeping the arrays themselves must not)
 '''
 
 class CExpPlusTimeR(tsc.MultiplexedTimeSeries):
 
     __handle__ = 'complex_exponential_with_times_and_real_transport'
+    # frames are only accumulated, which copies them
+    __reuse_frames__ = True
 
     def parameters(self):
         # configure parameter values for this service choice
@@ -60,6 +70,10 @@ class CExpPlusTimeR(tsc.MultiplexedTimeSeries):
 
         return t
 
+    def time_samples(self):
+        # number of time-samples of the run, as computed by the generator
+        return int(self.time_duration / self.sampling_interval)
+
     def receive(self,vals):
         # lists of values pulled from buffer
         #   are pushed here to be processed and interpreted
@@ -102,6 +116,8 @@ class CExpPlusTimeR(tsc.MultiplexedTimeSeries):
 class CExpC(tsc.MultiplexedTimeSeries):
 
     __handle__ = 'complex_exponential_with_complex_transport'
+    # frames are only accumulated, which copies them
+    __reuse_frames__ = True
 
     def parameters(self):
         # configure parameter values for this service choice
@@ -153,6 +169,8 @@ class CExpC(tsc.MultiplexedTimeSeries):
 class SigMFfileBrowser(tsc.MultiplexedTimeSeries):
 
     __handle__ = 'browse samples stored in a SigMF file'
+    # frames are only accumulated, which copies them
+    __reuse_frames__ = True
 
     def parameters(self):
         # configure parameter values for this service choice
@@ -167,6 +185,10 @@ class SigMFfileBrowser(tsc.MultiplexedTimeSeries):
 
         return t
 
+    def time_samples(self):
+        # the samples browsed are streamed one-for-one
+        return self.total_sample_count
+
     def receive(self,vals):
         # lists of values pulled from buffer
         #   are pushed here to be processed and interpreted
@@ -187,13 +209,18 @@ class SigMFfileBrowser(tsc.MultiplexedTimeSeries):
         self.t = range(self.starting_sample, self.starting_sample + self.total_sample_count,1)
 
         plt.figure('Real and imaginary signal values')
-        plt.plot(self.t, self.whole[0], 'ro', self.t, self.whole[1], 'bs')
+        if len(self.whole) == 1: # a real recording
+            plt.plot(self.t, self.whole[0], 'ro')
+        else:
+            plt.plot(self.t, self.whole[0], 'ro', self.t, self.whole[1], 'bs')
         plt.axis([self.starting_sample, self.starting_sample + self.total_sample_count, -128, 128])
         plt.show()
 
 class SigMFfilePeriodogram(tsc.MultiplexedTimeSeries):
 
     __handle__ = 'generate a Welch periodogram on a SigMF file'
+    # frames are only accumulated, which copies them
+    __reuse_frames__ = True
 
     def parameters(self):
         # configure parameter values for this service choice
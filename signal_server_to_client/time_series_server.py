@@ -6,10 +6,16 @@ Progammer David G Messerschmitt
 """
 
 import inspect
+import threading
+import sys
 import numpy as np
 from pprint import pprint
 
 import parameters as param
+import frames
+import execution
+import prefetch
+import ranges
 import message_server as ms
 import time_series_generators as tsg
 
@@ -47,9 +53,19 @@ class TimeSeriesServer(ms.StreamingServer):
                    
         # a place to store and manipulate parameter metadata
         self.param = param.Parameters()
+
+        # thread generating frames ahead of the stream, if agreed
+        self.prefetcher = None
+        # close() may be called at once by the thread producing the
+        #   stream and by the thread serving it
+        self._closing = threading.Lock()
 	 
         super().__init__()
 
+        # ranges of the recorded signals read by the SigMF generators
+        #   are also served directly, by GetRange and StreamRange
+        self.ranges = ranges.reader()
+
     def handle_to_gen(self,handle):
         # look up the generator class associated with a given handle
         # returns an instance of that class
@@ -71,6 +87,17 @@ class TimeSeriesServer(ms.StreamingServer):
             r = { 'service_type' : self.generators_desc }
             return [r, '']
             
+        if op == 'stream_report?':
+
+            # report on the most recent stream, like quantization accuracy
+            return [self.stream_report(), '']
+
+        if op == 'stats?':
+
+            # counters of the buffer and prefetching, which are kept
+            #   whether or not they are asked for
+            return [self.stats(), '']
+
         if op == 'service_choice':
 
             c = p['service_choice']           
@@ -79,6 +106,7 @@ class TimeSeriesServer(ms.StreamingServer):
             print('\nClient has chosen time-series generator ', c)
 
             # instantiate the chosen signal generator class
+            self.close()
             self.gen = self.handle_to_gen(c)
             
             # get parameter dictionary for this service
@@ -93,12 +121,38 @@ class TimeSeriesServer(ms.StreamingServer):
             # send parameter dictionary to client in answer message
             return [t,'']
 
+        elif op == 'open':
+            # choice of generator and configuration in a single operation
+            # p = generator and transport parameters plus 'service_choice'
+
+            if 'service_choice' not in p:
+                self.abort = True
+                return [{},"Error: parameter 'service_choice' must be specified"]
+            c = {'service_choice' : p['service_choice']}
+            [t,alert] = self.dispatch('service_choice',c)
+            if alert != '':
+                self.abort = True
+                return [{},alert]
+
+            del p['service_choice']
+            [s,alert] = self.dispatch('set',p)
+            if not self.abort:
+                # final parameter values, for the client's information
+                s['parameters'] = self.param.final()
+            return [s,alert]
+
         elif op == 'set':
             # configuration of server and client for this service
             #   with parameters provided by client
 
+            # the end of an earlier stream no longer cancels anything
+            self.claim(None)
+
             print('\nParameter values chosen by client:')
             pprint(p)
+
+            # transport-layer parameters are not of interest to the generator
+            [p,alert] = self.negotiate(p)
             self.param.update(p)
             print('\nFull set of parameter values including client changes:')
             pprint(self.param.final())
@@ -108,6 +162,13 @@ class TimeSeriesServer(ms.StreamingServer):
             # abort = True => further actions are skipped
             self.abort = False
 
+            # make sure the generator has every parameter chosen by client
+            field = self.param.unknown(p)
+            if field:
+                self.abort = True
+                print('\nAborting because of an unknown parameter')
+                return [{},"Error: parameter '{0}' not known to this generator".format(field)]
+
             # make sure all parameters have been specified
             field = self.param.complete()
             if field:
@@ -124,7 +185,12 @@ class TimeSeriesServer(ms.StreamingServer):
 
             # store parameters as variables in time-series generator object
             self.param_dict_to_var(self.gen, self.param.final())
-            
+
+            # a generator with __execution__ = 'process' is run in
+            #   a worker process rather than in this thread
+            self.close()
+            self.gen = execution.prepare(self.gen, self.param.final())
+
             # initialize signal generator for a new run
             # returns s = set of transport-layer parameters which will
             #   be returned to the client for compatible configuation
@@ -135,13 +201,188 @@ class TimeSeriesServer(ms.StreamingServer):
             # capture the shapes for later consistency checks
             self.shapes = s['array_shapes']
 
+            # packed frames carry values at the wire precision for this
+            #   data type (complex precision is negotiated with the client),
+            #   or as stored by the generator if the client so chooses
+            self.wire_dtype = frames.wire_dtype(
+                s['data_type'], self.transport, s.get('sample_dtype'))
+
+            # prepare streaming for the agreed transport, and report
+            #   the largest number of samples in any one message of a
+            #   flat stream (aligned frames are never split, so a
+            #   message of them may be larger)
+            self.transport['message_samples'] = self.configure_stream(
+                s['data_type'], self.wire_dtype)
+
+            # series declared by the generator as affine axes are
+            #   synthesized by the client rather than streamed, if agreed,
+            #   but at least one series must be streamed to carry the
+            #   frames (and the time dimension of the axes)
+            implicit = []
+            if self.transport['implicit_axes']:
+                implicit = [a['series'] for a in s.get('implicit_axes',[])]
+                if all(i in implicit for i in range(len(self.shapes))):
+                    implicit = []
+                    self.transport['implicit_axes'] = False
+                    alert = alert or 'Transport implicit_axes = True not supported, using False'
+            self.streamed = [i for i in range(len(self.shapes)) if i not in implicit]
+
+            # inform client of the transport configuration agreed upon
+            s['transport'] = self.transport
+
+            # the frames held at once must fit in the memory budget
+            #   of the session
+            self.data_type = s['data_type']
+            [frame_bytes,held] = self.frame_memory()
+            if self.buff.budget is not None and held > self.buff.budget:
+                self.abort = True
+                self.close()
+                print('\nAborting because frames exceed the memory budget')
+                return [{},'Error: frames of {0} bytes exceed the memory budget of {1} bytes'.format(
+                    frame_bytes,self.buff.budget)]
+
             # initialize the time-division multiplexing state
             self.sent = 0
 
+            # a new stream, not yet cancelled nor paced by the client
+            self.cancelled = False
+            self.credits = None
+
             # initialize buffer for a new run
             self.buff.initialize()
 
-            return [s,'']
+            return [s,alert]
+
+        elif op == 'resume':
+            # a stream which ended early continues where it left off
+            # p = {'sample' : number of time-samples the client received}
+            # the generator starts a new run, positioned at that
+            #   time-sample, and the next stream continues from there
+
+            if self.abort:
+                return [{},'Error: no configured stream to resume']
+            sample = p.get('sample')
+            if isinstance(sample,bool) or not isinstance(sample,int) or sample < 0:
+                return [{},"Error: parameter 'sample' must be a non-negative integer"]
+            print('\nClient resumes its stream at time-sample ', sample)
+
+            # the end of the interrupted stream, if noticed only now,
+            #   must not cancel the stream resumed
+            self.claim(None)
+            self.close()
+            self.gen = execution.prepare(self.gen, self.param.final())
+            self.gen.initialize()
+            if isinstance(self.gen, execution.RemoteGenerator):
+                positioned = self.gen.seek(sample)
+            else:
+                positioned = execution.seek(self.gen, sample)
+            if not positioned:
+                self.abort = True
+                self.close()
+                return [{},'Error: stream cannot be resumed at time-sample {}'.format(sample)]
+
+            self.sent = 0
+            self.cancelled = False
+            self.buff.initialize()
+            return [{'sample' : sample},'']
+
+    def close(self):
+        # ends any filling ahead of the buffer, any prefetching, and
+        #   any run of a generator in a worker process, returning the
+        #   worker to the pool
+        self.buff.cancel()
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.cancel()
+        # the thread filling the buffer may itself be closing
+        self.buff.stop()
+        with self._closing:
+            if self.prefetcher is not None:
+                self.prefetcher.close()
+                self.prefetcher = None
+            if isinstance(getattr(self,'gen',None), execution.RemoteGenerator):
+                self.gen.close()
+
+    def halt(self):
+        # stops the stream, any prefetching, and the generator itself
+        #   if it provides a cancel() method
+        super().halt()
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.cancel()
+        # no generator has been chosen if 'open' has failed
+        gen = getattr(self,'gen',None)
+        if hasattr(gen, 'cancel'):
+            gen.cancel()
+
+    def buffer_high(self):
+        # a bounded buffer far enough ahead of the stream pauses the
+        #   prefetching, so frames are not also queued behind it
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.pause()
+
+    def buffer_low(self):
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            prefetcher.resume()
+
+    def frame_memory(self,samples=None):
+        # returns [frame_bytes, held] = bytes of one streamed frame, and
+        #   of the frames held at once (prefetched, being generated and
+        #   buffered) for the agreed transport
+        # samples = time-samples per frame, if not those of the generator
+
+        if self.transport['packing'] == 'packed':
+            value_bytes = np.dtype(self.wire_dtype).itemsize
+        else:
+            # values for repeated fields are buffered as generated,
+            #   taken to be double precision
+            value_bytes = 16 if self.data_type == 'complex' else 8
+        values = 0
+        for i in self.streamed:
+            shape = list(self.shapes[i])
+            if samples is not None:
+                shape[0] = samples
+            values += int(np.prod(shape))
+        frame_bytes = value_bytes * values
+        held = (self.transport['prefetch'] + 2) * frame_bytes
+        held += self.transport['buffer_capacity'] * value_bytes
+        return [frame_bytes,held]
+
+    def resize(self,samples):
+        # a generator with a 'frame' parameter, run in this process,
+        #   generates frames of samples time-samples from its next
+        #   frame onwards, if within the bounds of that parameter
+        #   and of the memory budget of the session
+
+        if 'frame' not in self.param.final() or isinstance(
+                self.gen, execution.RemoteGenerator):
+            return False
+        bounds = self.param.parameters()['frame']
+        if samples < bounds.get('minimum',1) or samples > bounds.get('maximum',samples):
+            return False
+        [frame_bytes,held] = self.frame_memory(samples)
+        if self.buff.budget is not None and held > self.buff.budget:
+            return False
+        print('\nClient changes frame size to {} time-samples'.format(samples))
+        self.gen.frame = samples
+        self.param.final()['frame'] = samples
+        return True
+
+    def stream_report(self):
+        # adds statistics of the prefetching to the stream report
+        r = super().stream_report()
+        if self.prefetcher is not None:
+            r['prefetch'] = self.prefetcher.report()
+        return r
+
+    def stats(self):
+        # adds the counters of the prefetching to those of the buffer
+        r = super().stats()
+        if self.prefetcher is not None:
+            r['prefetch'] = self.prefetcher.report()
+        return r
 
     def param_dict_to_var(self,obj,p):
         # stores a set of parameters as variables for efficiency
@@ -154,6 +395,61 @@ class TimeSeriesServer(ms.StreamingServer):
         for field in p.keys():
             setattr(obj,field,p[field])       
       
+    def generate(self):
+        # calls the time-series generate() function and checks that it
+        #   returned a list with one numpy array for each time-series
+        # returns that list, or an empty list if the generator
+        #   is exhausted or has failed
+
+        if self.cancelled:
+            # release the prefetching thread and any worker process
+            print('\nStream ended by client')
+            self.close()
+            return []
+
+        # with prefetching, frames are generated ahead by a thread
+        #   while earlier frames are serialized and sent
+        # a stream paced by credit from the client is not prefetched,
+        #   so that frames are only generated once granted
+        if self.prefetcher is None and (
+                self.transport['prefetch'] == 0 or self.credits is not None):
+            vals_list = self.gen.generate()
+        else:
+            if self.prefetcher is None:
+                self.prefetcher = prefetch.Prefetcher(
+                    self.gen.generate, self.transport['prefetch'])
+            vals_list = self.prefetcher.get()
+
+        if not isinstance(vals_list, list):
+            print("\nError: Time series generator output is not a list of time-series array's")
+            return []
+        elif len(vals_list) == 0:
+            print('\nGenerator run completed')
+            return []
+        elif not len(vals_list) == len(self.shapes):
+            print('\nError: Time series generator returned list of time-series with wrong length')
+            return []
+        for vals in vals_list:
+            if not isinstance(vals, np.ndarray):
+                print('\nError: Time-series generator failed to return a numpy array')
+                print('\nValues returned:\n',vals)
+                return []
+        return vals_list
+
+    def frame(self):
+        # called by the aligned stream for each new multiplexed frame
+        # returns a list of [series index, values] for each time-series
+        #   to be streamed, with values a numpy array at wire precision,
+        #   or an empty list if the generator is exhausted
+
+        vals_list = self.generate()
+        if len(vals_list) == 0:
+            return []
+        return [
+            [i, vals_list[i].astype(self.wire_dtype,copy=False)]
+            for i in self.streamed
+            ]
+
     def get(self):
         # called repeatedly by buffer instance to feed it new
         #   frames of time-series values
@@ -164,34 +460,33 @@ class TimeSeriesServer(ms.StreamingServer):
         if self.sent == 0:
             # all time-division muliplexed time-series have been sent, so
             #   call generate() to replenish a new list of time-series array's
-            self.vals_list = self.gen.generate()
-            
-            if not isinstance(self.vals_list, list):
-                print("\nError: Time series generator output is not a list of time-series array's")
-                return []
-            elif len(self.vals_list) == 0:
-                print('\nGenerator run completed')
-                return []
-            elif not len(self.vals_list) == len(self.shapes):
-                print('\nError: Time series generator returned list of time-series with wrong length')
+            self.vals_list = self.generate()
+            if len(self.vals_list) == 0:
                 return []
         
-        vals = self.vals_list[self.sent]
+        vals = self.vals_list[self.streamed[self.sent]]
         self.sent += 1
-        if self.sent == len(self.vals_list):
+        if self.sent == len(self.streamed):
             self.sent = 0
         
-        if not isinstance(vals, np.ndarray):
-            print('\nError: Time-series generator failed to return a numpy array')
-            print('\nValues returned:\n',vals)
-            return []
-        
-        # flatten the numpy array and convert to a 1-D list
+        # flatten the numpy array
         # this serializes the values for transport over RPC
-        return list(np.ravel(vals))
+        if self.transport['packing'] == 'packed':
+            # packed frames are filled directly from the 1-D array
+            # an array already at wire precision (like the complex128
+            #   output of np.exp) is handed over without any copy
+            return np.ravel(vals).astype(self.wire_dtype,copy=False)
+        else:
+            # repeated fields are filled from the 1-D array
+            return np.ravel(vals)
     
 
 if __name__ == '__main__':
 
+    # 'python time_series_server.py aio' runs the asyncio server
+    #   rather than the threaded server
     s = TimeSeriesServer()
-    s.run()
+    if len(sys.argv) > 1:
+        s.run(sys.argv[1])
+    else:
+        s.run()
@@ -1,289 +1,57 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
 # source: time_series_streaming.proto
-
-import sys
-_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
 from google.protobuf import symbol_database as _symbol_database
-from google.protobuf import descriptor_pb2
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'time_series_streaming.proto'
+)
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
 
 
-
-
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='time_series_streaming.proto',
-  package='',
-  syntax='proto3',
-  serialized_pb=_b('\n\x1btime_series_streaming.proto\"/\n\x06\x43onfig\x12\x11\n\toperation\x18\x01 \x01(\t\x12\x12\n\nparameters\x18\x02 \x01(\t\"\'\n\x04Info\x12\x10\n\x08response\x18\x01 \x01(\t\x12\r\n\x05\x61lert\x18\x02 \x01(\t\"\x1c\n\nRealSample\x12\x0e\n\x06sample\x18\x01 \x03(\x02\")\n\rComplexSample\x12\x18\n\x06sample\x18\x01 \x03(\x0b\x32\x08.Complex\"%\n\x07\x43omplex\x12\x0c\n\x04real\x18\x01 \x01(\x02\x12\x0c\n\x04imag\x18\x02 \x01(\x02\x32\x97\x01\n\x13TimeSeriesStreaming\x12&\n\x14MetaDataCoordination\x12\x07.Config\x1a\x05.Info\x12(\n\x0eRealTimeSeries\x12\x07.Config\x1a\x0b.RealSample0\x01\x12.\n\x11\x43omplexTimeSeries\x12\x07.Config\x1a\x0e.ComplexSample0\x01\x62\x06proto3')
-)
-
-
-
-
-_CONFIG = _descriptor.Descriptor(
-  name='Config',
-  full_name='Config',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='operation', full_name='Config.operation', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='parameters', full_name='Config.parameters', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=31,
-  serialized_end=78,
-)
-
-
-_INFO = _descriptor.Descriptor(
-  name='Info',
-  full_name='Info',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='response', full_name='Info.response', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='alert', full_name='Info.alert', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=80,
-  serialized_end=119,
-)
-
-
-_REALSAMPLE = _descriptor.Descriptor(
-  name='RealSample',
-  full_name='RealSample',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='sample', full_name='RealSample.sample', index=0,
-      number=1, type=2, cpp_type=6, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=121,
-  serialized_end=149,
-)
-
-
-_COMPLEXSAMPLE = _descriptor.Descriptor(
-  name='ComplexSample',
-  full_name='ComplexSample',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='sample', full_name='ComplexSample.sample', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=151,
-  serialized_end=192,
-)
-
-
-_COMPLEX = _descriptor.Descriptor(
-  name='Complex',
-  full_name='Complex',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='real', full_name='Complex.real', index=0,
-      number=1, type=2, cpp_type=6, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='imag', full_name='Complex.imag', index=1,
-      number=2, type=2, cpp_type=6, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=194,
-  serialized_end=231,
-)
-
-_COMPLEXSAMPLE.fields_by_name['sample'].message_type = _COMPLEX
-DESCRIPTOR.message_types_by_name['Config'] = _CONFIG
-DESCRIPTOR.message_types_by_name['Info'] = _INFO
-DESCRIPTOR.message_types_by_name['RealSample'] = _REALSAMPLE
-DESCRIPTOR.message_types_by_name['ComplexSample'] = _COMPLEXSAMPLE
-DESCRIPTOR.message_types_by_name['Complex'] = _COMPLEX
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Config = _reflection.GeneratedProtocolMessageType('Config', (_message.Message,), dict(
-  DESCRIPTOR = _CONFIG,
-  __module__ = 'time_series_streaming_pb2'
-  # @@protoc_insertion_point(class_scope:Config)
-  ))
-_sym_db.RegisterMessage(Config)
-
-Info = _reflection.GeneratedProtocolMessageType('Info', (_message.Message,), dict(
-  DESCRIPTOR = _INFO,
-  __module__ = 'time_series_streaming_pb2'
-  # @@protoc_insertion_point(class_scope:Info)
-  ))
-_sym_db.RegisterMessage(Info)
-
-RealSample = _reflection.GeneratedProtocolMessageType('RealSample', (_message.Message,), dict(
-  DESCRIPTOR = _REALSAMPLE,
-  __module__ = 'time_series_streaming_pb2'
-  # @@protoc_insertion_point(class_scope:RealSample)
-  ))
-_sym_db.RegisterMessage(RealSample)
-
-ComplexSample = _reflection.GeneratedProtocolMessageType('ComplexSample', (_message.Message,), dict(
-  DESCRIPTOR = _COMPLEXSAMPLE,
-  __module__ = 'time_series_streaming_pb2'
-  # @@protoc_insertion_point(class_scope:ComplexSample)
-  ))
-_sym_db.RegisterMessage(ComplexSample)
-
-Complex = _reflection.GeneratedProtocolMessageType('Complex', (_message.Message,), dict(
-  DESCRIPTOR = _COMPLEX,
-  __module__ = 'time_series_streaming_pb2'
-  # @@protoc_insertion_point(class_scope:Complex)
-  ))
-_sym_db.RegisterMessage(Complex)
-
-
-
-_TIMESERIESSTREAMING = _descriptor.ServiceDescriptor(
-  name='TimeSeriesStreaming',
-  full_name='TimeSeriesStreaming',
-  file=DESCRIPTOR,
-  index=0,
-  options=None,
-  serialized_start=234,
-  serialized_end=385,
-  methods=[
-  _descriptor.MethodDescriptor(
-    name='MetaDataCoordination',
-    full_name='TimeSeriesStreaming.MetaDataCoordination',
-    index=0,
-    containing_service=None,
-    input_type=_CONFIG,
-    output_type=_INFO,
-    options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='RealTimeSeries',
-    full_name='TimeSeriesStreaming.RealTimeSeries',
-    index=1,
-    containing_service=None,
-    input_type=_CONFIG,
-    output_type=_REALSAMPLE,
-    options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='ComplexTimeSeries',
-    full_name='TimeSeriesStreaming.ComplexTimeSeries',
-    index=2,
-    containing_service=None,
-    input_type=_CONFIG,
-    output_type=_COMPLEXSAMPLE,
-    options=None,
-  ),
-])
-_sym_db.RegisterServiceDescriptor(_TIMESERIESSTREAMING)
-
-DESCRIPTOR.services_by_name['TimeSeriesStreaming'] = _TIMESERIESSTREAMING
-
+from google.protobuf import struct_pb2 as google_dot_protobuf_dot_struct__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1btime_series_streaming.proto\x1a\x1cgoogle/protobuf/struct.proto\"X\n\x06\x43onfig\x12\x11\n\toperation\x18\x01 \x01(\t\x12\x12\n\nparameters\x18\x02 \x01(\t\x12\'\n\x06values\x18\x03 \x01(\x0b\x32\x17.google.protobuf.Struct\"P\n\x04Info\x12\x10\n\x08response\x18\x01 \x01(\t\x12\r\n\x05\x61lert\x18\x02 \x01(\t\x12\'\n\x06values\x18\x03 \x01(\x0b\x32\x17.google.protobuf.Struct\"\x1c\n\nRealSample\x12\x0e\n\x06sample\x18\x01 \x03(\x02\")\n\rComplexSample\x12\x18\n\x06sample\x18\x01 \x03(\x0b\x32\x08.Complex\"%\n\x07\x43omplex\x12\x0c\n\x04real\x18\x01 \x01(\x02\x12\x0c\n\x04imag\x18\x02 \x01(\x02\"\xe0\x01\n\x05\x46rame\x12\x0f\n\x07payload\x18\x01 \x01(\x0c\x12\r\n\x05\x64type\x18\x02 \x01(\t\x12\x12\n\nbyte_order\x18\x03 \x01(\t\x12\r\n\x05shape\x18\x04 \x03(\r\x12\x10\n\x08sequence\x18\x05 \x01(\x04\x12\x16\n\x0equantized_from\x18\x06 \x01(\t\x12\x10\n\x08segments\x18\x07 \x03(\r\x12\r\n\x05scale\x18\x08 \x03(\x01\x12\x0e\n\x06offset\x18\t \x03(\x01\x12\r\n\x05\x63odec\x18\n \x01(\t\x12\x14\n\x0cseries_index\x18\x0b \x01(\r\x12\x14\n\x0c\x66rame_number\x18\x0c \x01(\x04\"L\n\x11MultiplexedFrames\x12\x16\n\x06series\x18\x01 \x03(\x0b\x32\x06.Frame\x12\r\n\x05\x66inal\x18\x02 \x01(\x08\x12\x10\n\x08sequence\x18\x03 \x01(\x04\"Y\n\x0cRangeRequest\x12\x0c\n\x04\x66ile\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\x04\x12\r\n\x05\x63ount\x18\x03 \x01(\x04\x12\x0e\n\x06stride\x18\x04 \x01(\x04\x12\r\n\x05\x66rame\x18\x05 \x01(\x04\"M\n\x06\x43redit\x12\x0e\n\x06\x66rames\x18\x01 \x01(\r\x12\r\n\x05\x62\x61tch\x18\x02 \x01(\r\x12\x15\n\rframe_samples\x18\x03 \x01(\r\x12\r\n\x05pause\x18\x04 \x01(\x08\"X\n\x0eSessionMessage\x12\x15\n\x04info\x18\x01 \x01(\x0b\x32\x05.InfoH\x00\x12$\n\x06\x66rames\x18\x02 \x01(\x0b\x32\x12.MultiplexedFramesH\x00\x42\t\n\x07\x63ontent2\x9e\x03\n\x13TimeSeriesStreaming\x12&\n\x14MetaDataCoordination\x12\x07.Config\x1a\x05.Info\x12(\n\x0eRealTimeSeries\x12\x07.Config\x1a\x0b.RealSample0\x01\x12.\n\x11\x43omplexTimeSeries\x12\x07.Config\x1a\x0e.ComplexSample0\x01\x12$\n\x0f\x46rameTimeSeries\x12\x07.Config\x1a\x06.Frame0\x01\x12\x32\n\x11\x41lignedTimeSeries\x12\x07.Config\x1a\x12.MultiplexedFrames0\x01\x12\x35\n\x12\x43reditedTimeSeries\x12\x07.Credit\x1a\x12.MultiplexedFrames(\x01\x30\x01\x12)\n\x0bOpenSession\x12\x07.Config\x1a\x0f.SessionMessage0\x01\x12!\n\x08GetRange\x12\r.RangeRequest\x1a\x06.Frame\x12&\n\x0bStreamRange\x12\r.RangeRequest\x1a\x06.Frame0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'time_series_streaming_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_CONFIG']._serialized_start=61
+  _globals['_CONFIG']._serialized_end=149
+  _globals['_INFO']._serialized_start=151
+  _globals['_INFO']._serialized_end=231
+  _globals['_REALSAMPLE']._serialized_start=233
+  _globals['_REALSAMPLE']._serialized_end=261
+  _globals['_COMPLEXSAMPLE']._serialized_start=263
+  _globals['_COMPLEXSAMPLE']._serialized_end=304
+  _globals['_COMPLEX']._serialized_start=306
+  _globals['_COMPLEX']._serialized_end=343
+  _globals['_FRAME']._serialized_start=346
+  _globals['_FRAME']._serialized_end=570
+  _globals['_MULTIPLEXEDFRAMES']._serialized_start=572
+  _globals['_MULTIPLEXEDFRAMES']._serialized_end=648
+  _globals['_RANGEREQUEST']._serialized_start=650
+  _globals['_RANGEREQUEST']._serialized_end=739
+  _globals['_CREDIT']._serialized_start=741
+  _globals['_CREDIT']._serialized_end=818
+  _globals['_SESSIONMESSAGE']._serialized_start=820
+  _globals['_SESSIONMESSAGE']._serialized_end=908
+  _globals['_TIMESERIESSTREAMING']._serialized_start=911
+  _globals['_TIMESERIESSTREAMING']._serialized_end=1325
 # @@protoc_insertion_point(module_scope)
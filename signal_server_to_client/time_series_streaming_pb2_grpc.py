@@ -1,80 +1,456 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import warnings
 
 import time_series_streaming_pb2 as time__series__streaming__pb2
 
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
 
-class TimeSeriesStreamingStub(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def __init__(self, channel):
-    """Constructor.
-
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.MetaDataCoordination = channel.unary_unary(
-        '/TimeSeriesStreaming/MetaDataCoordination',
-        request_serializer=time__series__streaming__pb2.Config.SerializeToString,
-        response_deserializer=time__series__streaming__pb2.Info.FromString,
-        )
-    self.RealTimeSeries = channel.unary_stream(
-        '/TimeSeriesStreaming/RealTimeSeries',
-        request_serializer=time__series__streaming__pb2.Config.SerializeToString,
-        response_deserializer=time__series__streaming__pb2.RealSample.FromString,
-        )
-    self.ComplexTimeSeries = channel.unary_stream(
-        '/TimeSeriesStreaming/ComplexTimeSeries',
-        request_serializer=time__series__streaming__pb2.Config.SerializeToString,
-        response_deserializer=time__series__streaming__pb2.ComplexSample.FromString,
-        )
-
-
-class TimeSeriesStreamingServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def MetaDataCoordination(self, request, context):
-    """Back-and-forth needed to coordinate server with client
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def RealTimeSeries(self, request, context):
-    """Signal consisting of a stream of real-valued samples
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def ComplexTimeSeries(self, request, context):
-    """Signal consisting of a stream of complex-valued samples
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in time_series_streaming_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class TimeSeriesStreamingStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.MetaDataCoordination = channel.unary_unary(
+                '/TimeSeriesStreaming/MetaDataCoordination',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.Info.FromString,
+                _registered_method=True)
+        self.RealTimeSeries = channel.unary_stream(
+                '/TimeSeriesStreaming/RealTimeSeries',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.RealSample.FromString,
+                _registered_method=True)
+        self.ComplexTimeSeries = channel.unary_stream(
+                '/TimeSeriesStreaming/ComplexTimeSeries',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.ComplexSample.FromString,
+                _registered_method=True)
+        self.FrameTimeSeries = channel.unary_stream(
+                '/TimeSeriesStreaming/FrameTimeSeries',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.Frame.FromString,
+                _registered_method=True)
+        self.AlignedTimeSeries = channel.unary_stream(
+                '/TimeSeriesStreaming/AlignedTimeSeries',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.MultiplexedFrames.FromString,
+                _registered_method=True)
+        self.CreditedTimeSeries = channel.stream_stream(
+                '/TimeSeriesStreaming/CreditedTimeSeries',
+                request_serializer=time__series__streaming__pb2.Credit.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.MultiplexedFrames.FromString,
+                _registered_method=True)
+        self.OpenSession = channel.unary_stream(
+                '/TimeSeriesStreaming/OpenSession',
+                request_serializer=time__series__streaming__pb2.Config.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.SessionMessage.FromString,
+                _registered_method=True)
+        self.GetRange = channel.unary_unary(
+                '/TimeSeriesStreaming/GetRange',
+                request_serializer=time__series__streaming__pb2.RangeRequest.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.Frame.FromString,
+                _registered_method=True)
+        self.StreamRange = channel.unary_stream(
+                '/TimeSeriesStreaming/StreamRange',
+                request_serializer=time__series__streaming__pb2.RangeRequest.SerializeToString,
+                response_deserializer=time__series__streaming__pb2.Frame.FromString,
+                _registered_method=True)
+
+
+class TimeSeriesStreamingServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def MetaDataCoordination(self, request, context):
+        """Back-and-forth needed to coordinate server with client
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RealTimeSeries(self, request, context):
+        """Signal consisting of a stream of real-valued samples
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ComplexTimeSeries(self, request, context):
+        """Signal consisting of a stream of complex-valued samples
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FrameTimeSeries(self, request, context):
+        """Signal consisting of a stream of packed binary frames, each carrying
+        	a block of real- or complex-valued samples as raw bytes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AlignedTimeSeries(self, request, context):
+        """Signal consisting of a stream of whole multiplexed frames, with
+        	each time-series of a frame packed into its own Frame
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CreditedTimeSeries(self, request_iterator, context):
+        """As AlignedTimeSeries, but paced by the client, which grants credit
+        	for further frames as it consumes them
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def OpenSession(self, request, context):
+        """Choice of generator, configuration and streaming in a single call:
+        	the first message carries the configuration information,
+        	and the following messages carry whole multiplexed frames
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRange(self, request, context):
+        """Random access to a range of samples of a recorded signal file,
+        	read straight from the file without any session or generator
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamRange(self, request, context):
+        """As GetRange, but for a longer range, streamed in several Frames
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_TimeSeriesStreamingServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'MetaDataCoordination': grpc.unary_unary_rpc_method_handler(
-          servicer.MetaDataCoordination,
-          request_deserializer=time__series__streaming__pb2.Config.FromString,
-          response_serializer=time__series__streaming__pb2.Info.SerializeToString,
-      ),
-      'RealTimeSeries': grpc.unary_stream_rpc_method_handler(
-          servicer.RealTimeSeries,
-          request_deserializer=time__series__streaming__pb2.Config.FromString,
-          response_serializer=time__series__streaming__pb2.RealSample.SerializeToString,
-      ),
-      'ComplexTimeSeries': grpc.unary_stream_rpc_method_handler(
-          servicer.ComplexTimeSeries,
-          request_deserializer=time__series__streaming__pb2.Config.FromString,
-          response_serializer=time__series__streaming__pb2.ComplexSample.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'TimeSeriesStreaming', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'MetaDataCoordination': grpc.unary_unary_rpc_method_handler(
+                    servicer.MetaDataCoordination,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.Info.SerializeToString,
+            ),
+            'RealTimeSeries': grpc.unary_stream_rpc_method_handler(
+                    servicer.RealTimeSeries,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.RealSample.SerializeToString,
+            ),
+            'ComplexTimeSeries': grpc.unary_stream_rpc_method_handler(
+                    servicer.ComplexTimeSeries,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.ComplexSample.SerializeToString,
+            ),
+            'FrameTimeSeries': grpc.unary_stream_rpc_method_handler(
+                    servicer.FrameTimeSeries,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.Frame.SerializeToString,
+            ),
+            'AlignedTimeSeries': grpc.unary_stream_rpc_method_handler(
+                    servicer.AlignedTimeSeries,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.MultiplexedFrames.SerializeToString,
+            ),
+            'CreditedTimeSeries': grpc.stream_stream_rpc_method_handler(
+                    servicer.CreditedTimeSeries,
+                    request_deserializer=time__series__streaming__pb2.Credit.FromString,
+                    response_serializer=time__series__streaming__pb2.MultiplexedFrames.SerializeToString,
+            ),
+            'OpenSession': grpc.unary_stream_rpc_method_handler(
+                    servicer.OpenSession,
+                    request_deserializer=time__series__streaming__pb2.Config.FromString,
+                    response_serializer=time__series__streaming__pb2.SessionMessage.SerializeToString,
+            ),
+            'GetRange': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRange,
+                    request_deserializer=time__series__streaming__pb2.RangeRequest.FromString,
+                    response_serializer=time__series__streaming__pb2.Frame.SerializeToString,
+            ),
+            'StreamRange': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamRange,
+                    request_deserializer=time__series__streaming__pb2.RangeRequest.FromString,
+                    response_serializer=time__series__streaming__pb2.Frame.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'TimeSeriesStreaming', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('TimeSeriesStreaming', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class TimeSeriesStreaming:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def MetaDataCoordination(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/TimeSeriesStreaming/MetaDataCoordination',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.Info.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RealTimeSeries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/RealTimeSeries',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.RealSample.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ComplexTimeSeries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/ComplexTimeSeries',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.ComplexSample.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FrameTimeSeries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/FrameTimeSeries',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.Frame.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AlignedTimeSeries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/AlignedTimeSeries',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.MultiplexedFrames.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CreditedTimeSeries(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/TimeSeriesStreaming/CreditedTimeSeries',
+            time__series__streaming__pb2.Credit.SerializeToString,
+            time__series__streaming__pb2.MultiplexedFrames.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def OpenSession(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/OpenSession',
+            time__series__streaming__pb2.Config.SerializeToString,
+            time__series__streaming__pb2.SessionMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRange(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/TimeSeriesStreaming/GetRange',
+            time__series__streaming__pb2.RangeRequest.SerializeToString,
+            time__series__streaming__pb2.Frame.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamRange(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/TimeSeriesStreaming/StreamRange',
+            time__series__streaming__pb2.RangeRequest.SerializeToString,
+            time__series__streaming__pb2.Frame.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)